@@ -1,8 +1,15 @@
-import requests
+import argparse
 import os
 import json
+import sys
+import types
 
-BASE_URL = "https://ezanvakti.emushaf.net"
+import data_io
+import http_client
+import pipeline_metrics
+
+# Overridable so the scripts can run against mock_api.py.
+BASE_URL = os.environ.get("EZANVAKTI_BASE_URL", "https://ezanvakti.emushaf.net")
 
 # Determine the repository root.
 # If this script is in the "scripts" folder, repo_root is one level up.
@@ -12,12 +19,12 @@ data_dir = os.path.join(repo_root, "data")
 
 os.makedirs(data_dir, exist_ok=True)
 
+client = http_client.RequestClient()
+
 def fetch_json(endpoint):
     url = BASE_URL + endpoint
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-        data = response.json()
+        data = client.get_json(url)
         validate_json_structure(data, name=endpoint)
         return data
     except Exception as e:
@@ -26,105 +33,188 @@ def fetch_json(endpoint):
 
 def validate_json_structure(data, name="Data"):
     if isinstance(data, dict):
-        print(f"[VALID] {name}: JSON object with keys: {list(data.keys())}")
+        pipeline_metrics.log(f"[VALID] {name}: JSON object with keys: {list(data.keys())}")
     elif isinstance(data, list):
-        print(f"[VALID] {name}: JSON array with {len(data)} items")
+        pipeline_metrics.log(f"[VALID] {name}: JSON array with {len(data)} items")
         if data and isinstance(data[0], dict):
-            print(f"  Example item keys: {list(data[0].keys())}")
+            pipeline_metrics.log(f"  Example item keys: {list(data[0].keys())}")
     else:
         print(f"[INVALID] {name}: Unexpected JSON type {type(data)}")
 
-def save_json(filename, data):
-    with open(filename, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-    print(f"Saved data to {filename}")
+def count_written(filename):
+    kind = pipeline_metrics.file_kind(filename)
+    pipeline_metrics.inc("files_written_total", kind=kind)
+    pipeline_metrics.inc("bytes_out_total", os.path.getsize(filename), kind=kind)
+    pipeline_metrics.log(f"Saved data to {filename}")
 
-def load_json(filename):
-    with open(filename, "r", encoding="utf-8") as f:
-        return json.load(f)
+def save_json(filename, data):
+    data_io.save_json(filename, data)
+    count_written(filename)
 
 def fetch_and_save(endpoint, filename, force_refresh=False):
     if not force_refresh and os.path.exists(filename):
-        print(f"Skipping {filename} (already exists)")
-        return load_json(filename)
+        pipeline_metrics.inc("files_skipped_total", kind=pipeline_metrics.file_kind(filename), reason="already exists")
+        pipeline_metrics.log(f"Skipping {filename} (already exists)")
+        return data_io.load_json(filename)
     data = fetch_json(endpoint)
     if data:
         save_json(filename, data)
     return data
 
-def main(force_refresh=False):
-    master_data = {"countries": []}
-    
-    # 1. Fetch Countries
-    countries = fetch_and_save("/ulkeler", os.path.join(data_dir, "countries.json"), force_refresh)
-    if not countries:
-        print("No countries data.")
+def iter_districts(city_id, force_refresh):
+    # 3. Fetch Districts for the City
+    districts = fetch_and_save(f"/ilceler/{city_id}", os.path.join(data_dir, f"districts_{city_id}.json"), force_refresh)
+    if not districts:
         return
-    for country in countries:
-        country_id = country.get("UlkeID")
+    for district in districts:
+        district_id = data_io.district_id(district)
+        if not district_id:
+            pipeline_metrics.log(f"    No district ID found for: {district}")
+            continue
+        pipeline_metrics.log(f"    Processing district (ID: {district_id})")
+
+        # 4. Fetch District Details
+        details = fetch_and_save(f"/ilce-detay/{district_id}", os.path.join(data_dir, f"district_detail_{district_id}.json"), force_refresh)
+
+        # 5. Fetch Prayer Times for the District
+        prayer_times = fetch_and_save(f"/vakitler/{district_id}", os.path.join(data_dir, f"prayer_times_{district_id}.json"), force_refresh)
+
+        yield {
+            "district": district,
+            "details": details,
+            "prayer_times": prayer_times
+        }
+
+def iter_cities(country_id, force_refresh):
+    # 2. Fetch Cities for the Country
+    cities = fetch_and_save(f"/sehirler/{country_id}", os.path.join(data_dir, f"cities_{country_id}.json"), force_refresh)
+    if not cities:
+        return
+    for city in data_io.City.from_list(cities):
+        city_id = city.SehirID
+        if not city_id:
+            continue
+        pipeline_metrics.log(f"  Processing city: {city.SehirAdiEn or city.SehirAdi} (ID: {city_id})")
+        yield {
+            "SehirAdi": city.SehirAdi,
+            "SehirAdiEn": city.SehirAdiEn,
+            "SehirID": city_id,
+            "districts": iter_districts(city_id, force_refresh),
+            # 6. Fetch Bayram Prayer Times for the City (once its districts are written)
+            "bayram": lambda city_id=city_id: fetch_and_save(f"/bayram-namazi/{city_id}", os.path.join(data_dir, f"bayram_{city_id}.json"), force_refresh)
+        }
+
+def iter_countries(countries, force_refresh):
+    for country in data_io.Country.from_list(countries):
+        country_id = country.UlkeID
         if not country_id:
             continue
-        print(f"Processing country: {country.get('UlkeAdiEn', country.get('UlkeAdi'))} (ID: {country_id})")
-        country_entry = {
-            "UlkeAdi": country.get("UlkeAdi"),
-            "UlkeAdiEn": country.get("UlkeAdiEn"),
+        pipeline_metrics.log(f"Processing country: {country.UlkeAdiEn or country.UlkeAdi} (ID: {country_id})")
+        yield {
+            "UlkeAdi": country.UlkeAdi,
+            "UlkeAdiEn": country.UlkeAdiEn,
             "UlkeID": country_id,
-            "cities": []
+            "cities": iter_cities(country_id, force_refresh)
         }
-        
-        # 2. Fetch Cities for the Country
-        cities = fetch_and_save(f"/sehirler/{country_id}", os.path.join(data_dir, f"cities_{country_id}.json"), force_refresh)
-        if not cities:
-            master_data["countries"].append(country_entry)
-            continue
-        
-        for city in cities:
-            city_id = city.get("SehirID")
-            if not city_id:
-                continue
-            print(f"  Processing city: {city.get('SehirAdiEn', city.get('SehirAdi'))} (ID: {city_id})")
-            city_entry = {
-                "SehirAdi": city.get("SehirAdi"),
-                "SehirAdiEn": city.get("SehirAdiEn"),
-                "SehirID": city_id,
-                "districts": [],
-                "bayram": None
-            }
-            
-            # 3. Fetch Districts for the City
-            districts = fetch_and_save(f"/ilceler/{city_id}", os.path.join(data_dir, f"districts_{city_id}.json"), force_refresh)
-            if districts:
+
+# The master data is built as a tree of generators and lazy values, and
+# encoded while it is walked, so only one district is held in memory at a time.
+
+def is_lazy(value):
+    return isinstance(value, types.GeneratorType) or callable(value)
+
+def resolve(value):
+    return value() if callable(value) else value
+
+def iter_encode(value, indent=None, level=0):
+    # Yields the same text json.dumps(value, indent=indent) would, with
+    # generators encoded as arrays and callables replaced by their result.
+    value = resolve(value)
+    item_separator, key_separator = (",", ": ") if indent is not None else (",", ":")
+    newline = "\n" + " " * (indent * (level + 1)) if indent is not None else ""
+    closing = "\n" + " " * (indent * level) if indent is not None else ""
+
+    if isinstance(value, dict) and any(is_lazy(item) for item in value.values()):
+        yield "{"
+        for index, (key, item) in enumerate(value.items()):
+            yield (item_separator if index else "") + newline + json.dumps(key, ensure_ascii=False) + key_separator
+            yield from iter_encode(item, indent, level + 1)
+        yield closing + "}"
+    elif isinstance(value, types.GeneratorType):
+        empty = True
+        for item in value:
+            yield ("[" if empty else item_separator) + newline
+            empty = False
+            yield from iter_encode(item, indent, level + 1)
+        yield "[]" if empty else closing + "]"
+    else:
+        # Plain data loaded from disk: let the C encoder do it in one go and
+        # shift its lines to the current depth.
+        text = json.dumps(value, ensure_ascii=False, indent=indent, separators=(item_separator, key_separator))
+        if indent is not None and level:
+            text = text.replace("\n", "\n" + " " * (indent * level))
+        yield text
+
+def write_master_json(filename, countries, compact=False):
+    with open(filename, "w", encoding="utf-8") as f:
+        for chunk in iter_encode({"countries": countries}, indent=None if compact else 2):
+            f.write(chunk)
+    count_written(filename)
+
+def write_master_ndjson(filename, countries):
+    # One record per line: each country, then each of its cities followed by
+    # that city's districts. Records carry the IDs of their parents.
+    def write_line(f, record):
+        f.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")))
+        f.write("\n")
+
+    with open(filename, "w", encoding="utf-8") as f:
+        for country in countries:
+            country_id = country["UlkeID"]
+            write_line(f, {"type": "country", **{k: v for k, v in country.items() if k != "cities"}})
+            for city in country["cities"]:
+                districts = city["districts"]
+                bayram = resolve(city["bayram"])
+                write_line(f, {"type": "city", "UlkeID": country_id,
+                               **{k: v for k, v in city.items() if k not in ("districts", "bayram")},
+                               "bayram": bayram})
                 for district in districts:
-                    district_id = district.get("IlceID") or district.get("kod") or district.get("ID")
-                    if not district_id:
-                        print(f"    No district ID found for: {district}")
-                        continue
-                    print(f"    Processing district (ID: {district_id})")
-                    
-                    # 4. Fetch District Details
-                    details = fetch_and_save(f"/ilce-detay/{district_id}", os.path.join(data_dir, f"district_detail_{district_id}.json"), force_refresh)
-                    
-                    # 5. Fetch Prayer Times for the District
-                    prayer_times = fetch_and_save(f"/vakitler/{district_id}", os.path.join(data_dir, f"prayer_times_{district_id}.json"), force_refresh)
-                    
-                    district_entry = {
-                        "district": district,
-                        "details": details,
-                        "prayer_times": prayer_times
-                    }
-                    city_entry["districts"].append(district_entry)
-            
-            # 6. Fetch Bayram Prayer Times for the City
-            bayram = fetch_and_save(f"/bayram-namazi/{city_id}", os.path.join(data_dir, f"bayram_{city_id}.json"), force_refresh)
-            city_entry["bayram"] = bayram
-            
-            country_entry["cities"].append(city_entry)
-        
-        master_data["countries"].append(country_entry)
-    
-    # Save entire hierarchical data into one master JSON file
-    save_json(os.path.join(data_dir, "master_data.json"), master_data)
+                    write_line(f, {"type": "district", "UlkeID": country_id, "SehirID": city["SehirID"], **district})
+    count_written(filename)
+
+def main(force_refresh=False, compact=False, ndjson=False):
+    # 1. Fetch Countries
+    countries = fetch_and_save("/ulkeler", os.path.join(data_dir, "countries.json"), force_refresh)
+    if not countries:
+        print("No countries data.")
+        client.report()
+        return False
+
+    # Save entire hierarchical data into one master file, streamed as it is fetched
+    if ndjson:
+        write_master_ndjson(os.path.join(data_dir, "master_data.ndjson"), iter_countries(countries, force_refresh))
+    else:
+        write_master_json(os.path.join(data_dir, "master_data.json"), iter_countries(countries, force_refresh), compact)
+    client.report()
+    # Fetch errors are only logged while the file is streamed; a list that
+    # failed would leave whole countries, cities or districts out of it.
+    failures = client.master_data_failures()
+    if failures:
+        print(f"Master data is incomplete: {len(failures)} country, city or district lists failed after retries")
+        return False
     print("Master data compilation complete.")
+    return True
 
 if __name__ == "__main__":
-    main(force_refresh=False)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Fetch everything and combine it into one master data file.")
+    parser.add_argument("--force-refresh", action="store_true", help="refetch files that already exist")
+    parser.add_argument("--compact", action="store_true", help="write master_data.json without indentation")
+    parser.add_argument("--ndjson", action="store_true", help="write master_data.ndjson, one record per line")
+    pipeline_metrics.add_arguments(parser)
+    args = parser.parse_args()
+    pipeline_metrics.apply_arguments(args)
+    with pipeline_metrics.stage("combine"):
+        complete = main(force_refresh=args.force_refresh, compact=args.compact, ndjson=args.ndjson)
+    pipeline_metrics.finish(args)
+    if not complete:
+        sys.exit(1)
@@ -1,67 +1,258 @@
+import argparse
 import os
-import json
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
 
-def load_json(filename):
-    with open(filename, 'r', encoding='utf-8') as f:
-        return json.load(f)
+import data_io
+import pipeline_metrics
 
-def main():
+# Parsed inputs are cached with the size and sha256 of the file they came from,
+# and country entries are only rebuilt when the content of one of their input
+# files changed. A file whose mtime and size match the cache isn't even
+# re-read; one that was only touched (as after a git checkout, where every
+# mtime is new) is hashed but not rebuilt.
+CACHE_FILE = os.path.join(".cache", "manifest_cache.json")
+CACHE_VERSION = 2
+
+def save_json(filename, data):
+    # Returns False without touching the file when its bytes wouldn't change.
+    payload = data_io.dumps(data)
+    kind = pipeline_metrics.file_kind(filename)
+    os.makedirs(os.path.dirname(filename), exist_ok=True)
+    if not data_io.write_if_changed(filename, payload):
+        pipeline_metrics.inc("files_skipped_total", kind=kind, reason="unchanged")
+        return False
+    pipeline_metrics.inc("files_written_total", kind=kind)
+    pipeline_metrics.inc("bytes_out_total", len(payload), kind=kind)
+    return True
+
+def read_input(filename):
+    # Returns the content key (byte size and sha256, which clients also use to
+    # verify what they fetched) and the value: prayer times are only needed
+    # for their size and hash, everything else is a list we need the content
+    # of.
+    with open(filename, "rb") as f:
+        payload = f.read()
+    key = [len(payload), hashlib.sha256(payload).hexdigest()]
+    if os.path.basename(filename).startswith("prayer_times_"):
+        return key, list(key)
+    return key, data_io.loads(payload)
+
+def stat_key(filename):
+    st = os.stat(filename)
+    return [st.st_mtime_ns, st.st_size]
+
+def load_inputs(target_data_dir, names, cache, pool=None):
+    # Returns {name: (content key, value)}; both are None for missing files.
+    # Cache hits cost one stat(); misses are read, in the process pool if any.
+    results = {}
+    misses = []
+    for name in names:
+        filename = os.path.join(target_data_dir, name)
+        if not os.path.exists(filename):
+            results[name] = (None, None)
+            continue
+        stat = stat_key(filename)
+        cached = cache["files"].get(name)
+        if cached and cached["stat"] == stat:
+            results[name] = (cached["key"], cached["value"])
+        else:
+            misses.append((name, stat))
+
+    paths = [os.path.join(target_data_dir, name) for name, _ in misses]
+    values = pool.map(read_input, paths, chunksize=64) if pool and len(paths) > 1 else map(read_input, paths)
+    for (name, stat), (key, value) in zip(misses, values):
+        cache["files"][name] = {"stat": stat, "key": key, "value": value}
+        results[name] = (key, value)
+    return results
+
+def city_ids(cities):
+    return [city.SehirID for city in data_io.City.from_list(cities) if city.SehirID]
+
+def build_country(country, cities, districts_by_city, prayer_files):
+    # Returns the manifest entry and the per-country shard for one country.
+    country = data_io.Country.from_dict(country)
+    ulke_id = country.UlkeID
+    country_entry = {
+        "UlkeID": ulke_id,
+        "UlkeAdi": country.UlkeAdi,
+        "UlkeAdiEn": country.UlkeAdiEn,
+        "shard_file": f"manifest_{ulke_id}.json",
+        "cities": []  # This will be populated below.
+    }
+    # The per-country shard repeats the city entries and adds their districts.
+    shard = {
+        "UlkeID": ulke_id,
+        "UlkeAdi": country.UlkeAdi,
+        "UlkeAdiEn": country.UlkeAdiEn,
+        "cities": []
+    }
+
+    for city in data_io.City.from_list(cities):
+        sehir_id = city.SehirID
+        if not sehir_id:
+            continue
+
+        # For each city, add pointers to its districts and bayram data.
+        city_entry = {
+            "SehirID": sehir_id,
+            "SehirAdi": city.SehirAdi,
+            "SehirAdiEn": city.SehirAdiEn,
+            "districts_file": f"districts_{sehir_id}.json",
+            "bayram_file": f"bayram_{sehir_id}.json"
+        }
+        country_entry["cities"].append(city_entry)
+
+        district_entries = []
+        for district in data_io.District.from_list(districts_by_city.get(sehir_id)):
+            ilce_id = district.id
+            if not ilce_id:
+                continue
+            prayer_times_file = f"prayer_times_{ilce_id}.json"
+            size, sha256 = prayer_files.get(prayer_times_file) or (None, None)
+            district_entries.append({
+                "IlceID": ilce_id,
+                "IlceAdi": district.IlceAdi,
+                "IlceAdiEn": district.IlceAdiEn,
+                "prayer_times_file": prayer_times_file,
+                "size": size,
+                "sha256": sha256
+            })
+        shard["cities"].append({**city_entry, "districts": district_entries})
+
+    return country_entry, shard
+
+def build_district_index(shards):
+    # Flat IlceID -> location lookup table, derived from the country shards.
+    district_index = {}
+    for shard in shards:
+        for city in shard["cities"]:
+            for district in city["districts"]:
+                district_index[district["IlceID"]] = {
+                    "UlkeID": shard["UlkeID"],
+                    "SehirID": city["SehirID"],
+                    "file": district["prayer_times_file"],
+                    "size": district["size"],
+                    "sha256": district["sha256"],
+                    "shard_file": f"manifest_{shard['UlkeID']}.json"
+                }
+    return district_index
+
+def main(incremental=False, workers=0):
     # Determine the repository root.
     # If this script is in a subfolder (e.g., "scripts"), then repo_root is one level up.
     script_dir = os.path.dirname(os.path.realpath(__file__))
     repo_root = os.path.abspath(os.path.join(script_dir, ".."))
     target_data_dir = os.path.join(repo_root, "data")
     os.makedirs(target_data_dir, exist_ok=True)
-    
+
     countries_file = os.path.join(target_data_dir, "countries.json")
-    
+
     if not os.path.exists(countries_file):
         print("countries.json not found in the data folder.")
         return
 
-    countries = load_json(countries_file)
+    cache_file = os.path.join(target_data_dir, CACHE_FILE)
+    cache = {"version": CACHE_VERSION, "files": {}, "countries": {}}
+    if incremental and os.path.exists(cache_file):
+        previous = data_io.load_json(cache_file)
+        if previous.get("version") == CACHE_VERSION:
+            cache = previous
+
+    countries = [country for country in data_io.load_json(countries_file) if country.get("UlkeID")]
+
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        # Load the cities files, then the districts files they point to, then
+        # the size/hash of every prayer times file.
+        cities = load_inputs(target_data_dir, [f"cities_{c['UlkeID']}.json" for c in countries], cache, pool)
+        all_city_ids = [sehir_id for _, value in cities.values() for sehir_id in city_ids(value)]
+        districts = load_inputs(target_data_dir, [f"districts_{sehir_id}.json" for sehir_id in all_city_ids], cache, pool)
+        prayer_names = [f"prayer_times_{data_io.district_id(d)}.json"
+                        for _, value in districts.values() for d in value or [] if data_io.district_id(d)]
+        prayer_times = load_inputs(target_data_dir, prayer_names, cache, pool)
+    finally:
+        if pool:
+            pool.shutdown()
+
     manifest = {"countries": []}
+    shards = []
+    rebuilt = written = 0
+    previous_countries = cache["countries"]
+    cache["countries"] = {}
 
     for country in countries:
-        ulke_id = country.get("UlkeID")
-        if not ulke_id:
-            continue
-        
-        country_entry = {
-            "UlkeID": ulke_id,
-            "UlkeAdi": country.get("UlkeAdi"),
-            "UlkeAdiEn": country.get("UlkeAdiEn"),
-            "cities": []  # This will be populated below.
-        }
+        ulke_id = country["UlkeID"]
+        cities_name = f"cities_{ulke_id}.json"
+        city_key, city_list = cities[cities_name]
+        if city_list is None:
+            print(f"Cities file for country {ulke_id} not found.")
+            city_list = []
 
-        # Load the cities file for this country.
-        cities_file = os.path.join(target_data_dir, f"cities_{ulke_id}.json")
-        if os.path.exists(cities_file):
-            cities = load_json(cities_file)
-            for city in cities:
-                sehir_id = city.get("SehirID")
-                if not sehir_id:
-                    continue
-
-                # For each city, add pointers to its districts and bayram data.
-                city_entry = {
-                    "SehirID": sehir_id,
-                    "SehirAdi": city.get("SehirAdi"),
-                    "SehirAdiEn": city.get("SehirAdiEn"),
-                    "districts_file": f"districts_{sehir_id}.json",
-                    "bayram_file": f"bayram_{sehir_id}.json"
-                }
-                country_entry["cities"].append(city_entry)
+        districts_by_city = {}
+        prayer_files = {}
+        signature = [country, [cities_name, city_key]]
+        for sehir_id in city_ids(city_list):
+            districts_name = f"districts_{sehir_id}.json"
+            district_key, district_list = districts[districts_name]
+            districts_by_city[sehir_id] = district_list
+            signature.append([districts_name, district_key])
+            for district in district_list or []:
+                prayer_name = f"prayer_times_{data_io.district_id(district)}.json"
+                if prayer_name in prayer_times:
+                    prayer_key, info = prayer_times[prayer_name]
+                    prayer_files[prayer_name] = info
+                    signature.append([prayer_name, prayer_key])
+
+        cached = previous_countries.get(ulke_id)
+        shard_exists = os.path.exists(os.path.join(target_data_dir, f"manifest_{ulke_id}.json"))
+        if cached and cached["signature"] == signature and shard_exists:
+            country_entry, shard = cached["entry"], cached["shard"]
         else:
-            print(f"Cities file for country {ulke_id} not found.")
-        
+            country_entry, shard = build_country(country, city_list, districts_by_city, prayer_files)
+            rebuilt += 1
+            if save_json(os.path.join(target_data_dir, country_entry["shard_file"]), shard):
+                written += 1
+        cache["countries"][ulke_id] = {"signature": signature, "entry": country_entry, "shard": shard}
+
         manifest["countries"].append(country_entry)
+        shards.append(shard)
+
+    pipeline_metrics.set_gauge("manifest_countries", len(countries), state="total")
+    pipeline_metrics.set_gauge("manifest_countries", rebuilt, state="rebuilt")
+    print(f"Country shards: {rebuilt} rebuilt, {written} written, {len(countries) - rebuilt} unchanged")
 
     # Save the manifest file.
     manifest_file = os.path.join(target_data_dir, "manifest.json")
-    with open(manifest_file, "w", encoding="utf-8") as f:
-        json.dump(manifest, f, ensure_ascii=False, indent=2)
-    print(f"Manifest created: {manifest_file}")
+    if save_json(manifest_file, manifest):
+        pipeline_metrics.log(f"Manifest created: {manifest_file}")
+    else:
+        pipeline_metrics.log(f"Manifest unchanged: {manifest_file}")
+
+    # Save the flat IlceID lookup table.
+    district_index = build_district_index(shards)
+    index_file = os.path.join(target_data_dir, "district_index.json")
+    if save_json(index_file, {"districts": district_index}):
+        pipeline_metrics.log(f"District index created: {index_file} ({len(district_index)} districts)")
+    else:
+        pipeline_metrics.log(f"District index unchanged: {index_file}")
+
+    if incremental:
+        # Drop entries for files that no longer exist before saving.
+        seen = set(cities) | set(districts) | set(prayer_times)
+        cache["files"] = {name: entry for name, entry in cache["files"].items() if name in seen}
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        data_io.save_json(cache_file, cache, compact=True)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Build manifest.json, the country shards and the district index.")
+    parser.add_argument("--incremental", action="store_true",
+                        help="reuse parsed inputs and country entries cached from the previous run")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="parse/hash input files in a process pool of this size")
+    pipeline_metrics.add_arguments(parser)
+    args = parser.parse_args()
+    pipeline_metrics.apply_arguments(args)
+    with pipeline_metrics.stage("manifest"):
+        main(incremental=args.incremental, workers=args.workers)
+    pipeline_metrics.finish(args)
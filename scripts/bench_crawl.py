@@ -0,0 +1,138 @@
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+import mock_api
+
+# End-to-end crawl benchmark against mock_api.py: runs fetch_prayer_data.main
+# and/or _combineToFinalJSON_master_data.main into an empty temp directory
+# and reports wall time, requests/s, peak RSS and bytes written.
+#
+#   python scripts/bench_crawl.py --targets fetch --concurrency 1 16 --latency-ms 30
+#
+# Each run is a separate process, so peak RSS is per run.
+
+script_dir = os.path.dirname(os.path.realpath(__file__))
+
+TARGETS = {
+    "fetch": "fetch_prayer_data",
+    "master": "_combineToFinalJSON_master_data",
+}
+
+CHILD = """
+import json, os, resource, sys, time, contextlib
+sys.path.insert(0, {script_dir!r})
+import http_client
+module = __import__({module!r})
+module.BASE_URL = {base_url!r}
+module.data_dir = {out_dir!r}
+module.client = http_client.RequestClient(rate={rate!r}, pool_size={pool_size!r})
+started = time.perf_counter()
+with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+    module.main(**{kwargs!r})
+elapsed = time.perf_counter() - started
+print(json.dumps({{"wall": elapsed, "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}}))
+"""
+
+def directory_size(path):
+    total = files = 0
+    for root, _, names in os.walk(path):
+        for name in names:
+            total += os.path.getsize(os.path.join(root, name))
+            files += 1
+    return total, files
+
+def run_once(settings, base_url, target, concurrency, rate, seed_dir=None, refresh=None):
+    out_dir = tempfile.mkdtemp(prefix=f"bench_{target}_")
+    try:
+        if seed_dir:
+            shutil.copytree(seed_dir, out_dir, dirs_exist_ok=True)
+        kwargs = {}
+        if target == "fetch":
+            kwargs["concurrency"] = concurrency
+            if refresh:
+                kwargs["refresh"] = refresh
+        code = CHILD.format(script_dir=script_dir, module=TARGETS[target], base_url=base_url, out_dir=out_dir,
+                            rate=rate, pool_size=max(10, concurrency), kwargs=kwargs)
+
+        with settings.lock:
+            requests_before = settings.stats["requests"]
+            bytes_before = settings.stats["bytes_out"]
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+        if result.returncode != 0 and not result.stdout.strip():
+            raise RuntimeError(f"{target} failed:\n{result.stderr}")
+        child = json.loads(result.stdout.strip().splitlines()[-1])
+        with settings.lock:
+            requests = settings.stats["requests"] - requests_before
+            bytes_in = settings.stats["bytes_out"] - bytes_before
+
+        written, files = directory_size(out_dir)
+        return {
+            "target": target,
+            "concurrency": concurrency if target == "fetch" else 1,
+            "refresh": refresh or "missing",
+            "wall_s": round(child["wall"], 3),
+            "requests": requests,
+            "requests_per_s": round(requests / child["wall"], 1) if child["wall"] else None,
+            "peak_rss_mb": round(child["peak_rss_kb"] / 1024, 1),
+            "bytes_in": bytes_in,
+            "bytes_written": written,
+            "files": files,
+        }
+    finally:
+        shutil.rmtree(out_dir, ignore_errors=True)
+
+def print_table(results):
+    columns = ["target", "concurrency", "refresh", "wall_s", "requests", "requests_per_s", "peak_rss_mb",
+               "bytes_in", "bytes_written", "files"]
+    widths = {c: max(len(c), *(len(str(r[c])) for r in results)) for c in columns}
+    print("  ".join(c.rjust(widths[c]) for c in columns))
+    for result in results:
+        print("  ".join(str(result[c]).rjust(widths[c]) for c in columns))
+
+def main(targets, concurrency_levels, snapshot_dir, latency_ms=0.0, jitter_ms=0.0, error_rate=0.0,
+         rate_limit=0.0, rate=0.0, incremental=False):
+    settings = mock_api.MockSettings(snapshot_dir, latency_ms, jitter_ms, error_rate, rate_limit)
+    server, base_url = mock_api.start(settings)
+    results = []
+    try:
+        for target in targets:
+            levels = concurrency_levels if target == "fetch" else [1]
+            for concurrency in levels:
+                print(f"Running {target} (concurrency {concurrency}) against {base_url} ...", file=sys.stderr)
+                results.append(run_once(settings, base_url, target, concurrency, rate))
+                if incremental and target == "fetch":
+                    # Second pass over a full copy: measures what a refresh costs.
+                    results.append(run_once(settings, base_url, target, concurrency, rate,
+                                            seed_dir=snapshot_dir, refresh="incremental"))
+    finally:
+        server.shutdown()
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the crawl scripts against the mock ezanvakti API.")
+    parser.add_argument("--targets", nargs="+", choices=sorted(TARGETS), default=["fetch"])
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 16],
+                        help="concurrency levels to run fetch with")
+    parser.add_argument("--snapshot-dir", default=mock_api.data_dir, help="recorded data/ to serve")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="mock throttles above this many requests/s")
+    parser.add_argument("--rate", type=float, default=0.0, help="client-side rate limit (0 disables it)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="also time an incremental refresh of a full copy of the snapshot")
+    parser.add_argument("--json", action="store_true", help="print results as JSON lines")
+    args = parser.parse_args()
+
+    results = main(args.targets, args.concurrency, args.snapshot_dir, args.latency_ms, args.jitter_ms,
+                   args.error_rate, args.rate_limit, args.rate, args.incremental)
+    if args.json:
+        for result in results:
+            print(json.dumps(result))
+    else:
+        print_table(results)
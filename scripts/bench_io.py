@@ -0,0 +1,128 @@
+import argparse
+import gc
+import glob
+import os
+import sys
+import time
+import tracemalloc
+
+import data_io
+
+# JSON backend benchmark on the real data/ files: for every installed backend,
+# how long parsing all of them takes and how long writing them back takes,
+# indented (the committed layout) and compact, and whether the output is
+# byte-identical to the standard library's. Then the memory the prayer times
+# take as plain dicts vs data_io.TimesRow records.
+#
+#   python scripts/bench_io.py
+#   python scripts/bench_io.py --backends json orjson --repeat 5
+#
+# Files are read into memory first, so disk speed doesn't enter into it.
+
+script_dir = os.path.dirname(os.path.realpath(__file__))
+repo_root = os.path.abspath(os.path.join(script_dir, ".."))
+data_dir = os.path.join(repo_root, "data")
+
+def read_files(source_dir, limit=None):
+    filenames = sorted(glob.glob(os.path.join(source_dir, "*.json")))[:limit]
+    payloads = []
+    for filename in filenames:
+        with open(filename, "rb") as f:
+            payloads.append(f.read())
+    return payloads
+
+def best_of(repeat, function):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def bench_backend(name, payloads, repeat):
+    data_io.set_backend(name)
+    documents = [data_io.loads(payload) for payload in payloads]
+    indented = [data_io.dumps(document) for document in documents]
+    compact = [data_io.dumps(document, compact=True) for document in documents]
+    return {
+        "backend": name,
+        "load_s": round(best_of(repeat, lambda: [data_io.loads(payload) for payload in payloads]), 3),
+        "dump_s": round(best_of(repeat, lambda: [data_io.dumps(document) for document in documents]), 3),
+        "dump_compact_s": round(best_of(repeat, lambda: [data_io.dumps(document, compact=True)
+                                                         for document in documents]), 3),
+        "indented_mb": round(sum(map(len, indented)) / 2 ** 20, 1),
+        "compact_mb": round(sum(map(len, compact)) / 2 ** 20, 1),
+        "identical": indented == payloads,
+    }, compact
+
+def traced_size(build):
+    gc.collect()
+    tracemalloc.start()
+    kept = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return size
+
+def bench_records(source_dir, limit=None):
+    filenames = sorted(glob.glob(os.path.join(source_dir, "prayer_times_*.json")))[:limit]
+    rows = sum(len(data_io.load_json(filename)) for filename in filenames)
+    # Both sides parse the files inside the trace, so the strings count for
+    # both; the records side drops each parsed dict once it is converted.
+    as_dicts = traced_size(lambda: [data_io.load_json(filename) for filename in filenames])
+    as_records = traced_size(lambda: [data_io.TimesRow.from_list(data_io.load_json(filename))
+                                      for filename in filenames])
+    return {"files": len(filenames), "rows": rows, "dict_mb": round(as_dicts / 2 ** 20, 1),
+            "record_mb": round(as_records / 2 ** 20, 1)}
+
+def print_table(results, columns):
+    widths = {c: max(len(c), *(len(str(r[c])) for r in results)) for c in columns}
+    print("  ".join(c.rjust(widths[c]) for c in columns))
+    for result in results:
+        print("  ".join(str(result[c]).rjust(widths[c]) for c in columns))
+
+def main(backends, source_dir=data_dir, repeat=3, limit=None):
+    payloads = read_files(source_dir, limit)
+    if not payloads:
+        print(f"No JSON files in {source_dir}")
+        return False
+    print(f"{len(payloads)} files, {sum(map(len, payloads)) / 2 ** 20:.1f} MB", file=sys.stderr)
+
+    previous = data_io.backend
+    results = []
+    reference = None
+    try:
+        for name in backends:
+            result, compact = bench_backend(name, payloads, repeat)
+            # Compact output has no committed copy to compare with; hold it
+            # to the first backend's instead.
+            reference = reference or compact
+            result["compact_identical"] = compact == reference
+            results.append(result)
+    finally:
+        data_io.set_backend(previous)
+    records = bench_records(source_dir, limit)
+
+    print_table(results, ["backend", "load_s", "dump_s", "dump_compact_s", "indented_mb", "compact_mb",
+                          "identical", "compact_identical"])
+    print()
+    print_table([records], ["files", "rows", "dict_mb", "record_mb"])
+    return True
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the JSON backends of data_io on the data folder.")
+    parser.add_argument("--backends", nargs="+", choices=data_io.BACKENDS, default=None,
+                        help="backends to compare (default: every installed one)")
+    parser.add_argument("--data-dir", default=data_dir)
+    parser.add_argument("--repeat", type=int, default=3, help="runs per measurement; the best one counts")
+    parser.add_argument("--limit", type=int, default=None, help="only use the first N files")
+    args = parser.parse_args()
+
+    backends = args.backends or data_io.available_backends()
+    missing = [name for name in backends if name not in data_io.available_backends()]
+    if missing:
+        print(f"Not installed: {', '.join(missing)}")
+        sys.exit(1)
+    if not main(["json"] + [name for name in backends if name != "json"], args.data_dir, args.repeat, args.limit):
+        sys.exit(1)
@@ -0,0 +1,105 @@
+import argparse
+import datetime
+import heapq
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import data_io
+import fetch_prayer_data
+import refresh_state
+import timetable
+
+# Refetches prayer times only for the districts whose data is about to run
+# out, most urgent first, instead of recrawling everything on a fixed date.
+
+DEFAULT_MARGIN_DAYS = 7
+def scan_coverage(data_dir):
+    # Returns a heap of (last covered date, IlceID); files without any usable
+    # date sort first so they are refetched before anything else.
+    heap = []
+    for district_id, filename in data_io.iter_prayer_files(data_dir):
+        try:
+            end = timetable.last_date(data_io.load_json(filename))
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            print(f"Unreadable {filename}: {e}")
+            end = None
+        heap.append((end or datetime.date.min, district_id))
+    heapq.heapify(heap)
+    return heap
+
+def report_horizon(heap, today):
+    if not heap:
+        print("No prayer_times files found.")
+        return None
+    end, district_id = heap[0]
+    horizon = (end - today).days
+    print(f"Minimum remaining horizon: {horizon} days (district {district_id}, covered until {end})")
+    return horizon
+
+def due_districts(heap, today, margin_days, limit=None):
+    # Pops districts in expiry order while they fall inside the margin.
+    heap = list(heap)
+    due = []
+    while heap and (heap[0][0] - today).days < margin_days:
+        if limit is not None and len(due) >= limit:
+            break
+        due.append(heapq.heappop(heap)[1])
+    return due
+
+def main(margin_days=DEFAULT_MARGIN_DAYS, concurrency=fetch_prayer_data.DEFAULT_CONCURRENCY, limit=None,
+         dry_run=False, fail_below=None):
+    data_dir = fetch_prayer_data.data_dir
+    today = datetime.date.today()
+
+    heap = scan_coverage(data_dir)
+    print(f"Scanned {len(heap)} districts")
+    horizon = report_horizon(heap, today)
+
+    due = due_districts(heap, today, margin_days, limit)
+    print(f"{len(due)} districts have less than {margin_days} days left")
+    if due and not dry_run:
+        # Go through the incremental path so validators, content hashes and the
+        # refresh state stay consistent with fetch_prayer_data.py --incremental.
+        fetch_prayer_data.refresh_mode = "incremental"
+        fetch_prayer_data.state = refresh_state.RefreshState(
+            os.path.join(data_dir, refresh_state.STATE_FILENAME), min_coverage_days=margin_days)
+        fetch_prayer_data.client.configure_pool(concurrency)
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            jobs = [
+                pool.submit(fetch_prayer_data.fetch_and_save, f"/vakitler/{district_id}",
+                            os.path.join(data_dir, f"prayer_times_{district_id}.json"))
+                for district_id in due
+            ]
+            for job in jobs:
+                job.result()
+        fetch_prayer_data.state.save()
+        fetch_prayer_data.client.report()
+
+        heap = scan_coverage(data_dir)
+        print("After refresh:")
+        horizon = report_horizon(heap, today)
+
+    if fetch_prayer_data.client.exhausted:
+        return False
+    if fail_below is not None and horizon is not None and horizon < fail_below:
+        print(f"Remaining horizon is below {fail_below} days.")
+        return False
+    return True
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Refetch prayer times for districts that are about to run out of data.")
+    parser.add_argument("--margin-days", type=int, default=DEFAULT_MARGIN_DAYS,
+                        help="refetch districts with fewer than this many days of coverage left")
+    parser.add_argument("--concurrency", type=int, default=fetch_prayer_data.DEFAULT_CONCURRENCY,
+                        help="number of parallel requests")
+    parser.add_argument("--limit", type=int, default=None,
+                        help="refetch at most this many districts, most urgent first")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="only report coverage, don't fetch anything")
+    parser.add_argument("--fail-below", type=int, default=None,
+                        help="exit non-zero if the minimum horizon is still below this many days")
+    args = parser.parse_args()
+    if not main(margin_days=args.margin_days, concurrency=args.concurrency, limit=args.limit,
+                dry_run=args.dry_run, fail_below=args.fail_below):
+        sys.exit(1)
@@ -0,0 +1,103 @@
+import datetime
+import os
+import threading
+import time
+
+import data_io
+import pipeline_metrics
+
+# Checkpoint journal for fetch_prayer_data.py: every endpoint the crawl has
+# reached, with its outcome,
+#   endpoint -> {"status", "file", "error", "updated"}
+# where status is one of
+#   pending  queued or in flight when the journal was last saved
+#   done     fetched (or found fresh / unchanged) and saved
+#   absent   upstream answered 4xx; retrying won't help
+#   failed   network error, 5xx or retries exhausted
+# It is flushed every few seconds while the crawl runs, so a killed run loses
+# at most that much. `--resume` skips what is done or absent and redoes the
+# rest. A run that finishes with nothing failed or pending deletes it.
+
+JOURNAL_FILE = os.path.join(".cache", "crawl_journal.json")
+FLUSH_INTERVAL = 5.0
+UNFINISHED = ("pending", "failed")
+
+def utc_timestamp():
+    return datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds")
+
+class CrawlJournal:
+    def __init__(self, path, resume=False):
+        self.path = path
+        self.lock = threading.Lock()
+        self.last_flush = time.monotonic()
+        self.started = utc_timestamp()
+        self.entries = {}
+        if resume and os.path.exists(path):
+            journal = data_io.load_json(path)
+            self.started = journal.get("started", self.started)
+            self.entries = journal.get("endpoints", {})
+
+    def status(self, endpoint):
+        with self.lock:
+            return (self.entries.get(endpoint) or {}).get("status")
+
+    def is_finished(self, endpoint):
+        return self.status(endpoint) in ("done", "absent")
+
+    def mark(self, endpoint, status, filename=None, error=None):
+        with self.lock:
+            entry = self.entries.setdefault(endpoint, {})
+            entry["status"] = status
+            entry["updated"] = utc_timestamp()
+            if filename:
+                entry["file"] = os.path.basename(filename)
+            if error is not None:
+                entry["error"] = str(error)
+            else:
+                entry.pop("error", None)
+        self.maybe_flush()
+
+    def add_pending(self, endpoints):
+        # Endpoints discovered but not started yet; already-finished ones keep
+        # their status.
+        with self.lock:
+            now = utc_timestamp()
+            for endpoint, filename in endpoints:
+                entry = self.entries.setdefault(endpoint, {"status": "pending", "updated": now})
+                entry.setdefault("file", os.path.basename(filename))
+        self.maybe_flush()
+
+    def counts(self):
+        with self.lock:
+            counts = {}
+            for entry in self.entries.values():
+                counts[entry["status"]] = counts.get(entry["status"], 0) + 1
+            return counts
+
+    def unfinished(self):
+        with self.lock:
+            return sorted(endpoint for endpoint, entry in self.entries.items() if entry["status"] in UNFINISHED)
+
+    def maybe_flush(self):
+        if time.monotonic() - self.last_flush >= FLUSH_INTERVAL:
+            self.save()
+
+    def save(self):
+        with self.lock:
+            self.last_flush = time.monotonic()
+            payload = data_io.dumps({"started": self.started, "saved": utc_timestamp(), "endpoints": self.entries},
+                                    compact=True, sort_keys=True)
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            data_io.atomic_write(self.path, payload)
+
+    def finish(self):
+        # Deletes the journal if the crawl is complete, otherwise saves it.
+        # Returns the status counts.
+        counts = self.counts()
+        for status, count in counts.items():
+            pipeline_metrics.set_gauge("crawl_journal_endpoints", count, status=status)
+        if any(counts.get(status) for status in UNFINISHED):
+            self.save()
+        elif os.path.exists(self.path):
+            os.remove(self.path)
+        return counts
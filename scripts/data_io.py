@@ -0,0 +1,211 @@
+import functools
+import glob
+import json
+import os
+import re
+import tempfile
+
+import timetable
+
+# Shared JSON I/O for the scripts: one place that reads and writes the data
+# files, with a selectable backend, plus small typed records for the API's
+# objects.
+#
+# Backends:
+#   json      the standard library; always available
+#   orjson    much faster; for the values this dataset holds (strings,
+#             integers, null and floats such as 3.0) its indented output is
+#             byte-identical to json.dumps(indent=2, ensure_ascii=False), so
+#             files don't churn. Not for every float: orjson writes 1e16 and
+#             1e-7 where json writes 1e+16 and 1e-07. bench_io.py checks the
+#             real files.
+#   msgspec   fast decoding and compact encoding; indented output goes
+#             through the standard library, since msgspec's formatter
+#             doesn't lay out JSON quite like json.dumps
+# The default is the fastest one installed; PRAYER_JSON_BACKEND=json (or
+# set_backend()) picks one explicitly.
+
+BACKENDS = ("orjson", "msgspec", "json")
+PRAYER_TIMES_PATTERN = re.compile(r"^prayer_times_(\d+)\.json$")
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+def available_backends():
+    return [name for name in BACKENDS if name == "json" or globals()[name] is not None]
+
+def set_backend(name):
+    global backend
+    if name not in available_backends():
+        raise ValueError(f"JSON backend {name!r} is not installed (available: {', '.join(available_backends())})")
+    backend = name
+
+# os.umask() can only be read by setting it.
+UMASK = os.umask(0)
+os.umask(UMASK)
+
+backend = None
+set_backend(os.environ.get("PRAYER_JSON_BACKEND") or available_backends()[0])
+
+def loads(payload):
+    if backend == "orjson":
+        return orjson.loads(payload)
+    if backend == "msgspec":
+        try:
+            return msgspec.json.decode(payload)
+        except msgspec.DecodeError as e:
+            # Callers catch ValueError, as json and orjson raise.
+            raise ValueError(str(e)) from e
+    return json.loads(payload)
+
+def dumps(data, compact=False, sort_keys=False):
+    # UTF-8 bytes: indented by two spaces like the API files, or without any
+    # whitespace when compact.
+    if backend == "orjson":
+        option = orjson.OPT_NON_STR_KEYS | (0 if compact else orjson.OPT_INDENT_2)
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(data, option=option)
+    if backend == "msgspec" and compact and not sort_keys:
+        return msgspec.json.encode(data)
+    if compact:
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":"), sort_keys=sort_keys).encode("utf-8")
+    return json.dumps(data, ensure_ascii=False, indent=2, sort_keys=sort_keys).encode("utf-8")
+
+def load_json(filename):
+    with open(filename, "rb") as f:
+        return loads(f.read())
+
+def atomic_write(filename, payload):
+    # Write to a temp file next to the target and rename it over, so readers
+    # (and a crawl that gets killed) never see a half-written file. The temp
+    # name is unique, so two writers of the same file don't share one; it
+    # ends in .tmp so a leftover from a crash is gitignored.
+    directory, name = os.path.split(os.path.abspath(filename))
+    with tempfile.NamedTemporaryFile(dir=directory, prefix=f".{name}.", suffix=".tmp", delete=False) as f:
+        try:
+            f.write(payload)
+        except BaseException:
+            f.close()
+            os.remove(f.name)
+            raise
+    try:
+        # NamedTemporaryFile creates 0600; give it the mode open() would.
+        os.chmod(f.name, 0o666 & ~UMASK)
+        os.replace(f.name, filename)
+    except BaseException:
+        os.remove(f.name)
+        raise
+
+def write_if_changed(filename, payload):
+    # Returns False without touching the file when its bytes wouldn't change.
+    if os.path.exists(filename):
+        with open(filename, "rb") as f:
+            if f.read() == payload:
+                return False
+    atomic_write(filename, payload)
+    return True
+
+def save_json(filename, data, compact=False):
+    atomic_write(filename, dumps(data, compact))
+
+def cached_file(maxsize):
+    # Decorator for parse(filename): keeps the results of the last `maxsize`
+    # files and parses a file again once its mtime or size changes.
+    # parse.cache_clear() empties the cache.
+    def decorate(parse):
+        @functools.lru_cache(maxsize=maxsize)
+        def parse_version(filename, mtime_ns, size):
+            return parse(filename)
+
+        @functools.wraps(parse)
+        def load(filename):
+            st = os.stat(filename)
+            return parse_version(filename, st.st_mtime_ns, st.st_size)
+
+        load.cache_clear = parse_version.cache_clear
+        return load
+    return decorate
+
+def iter_prayer_files(source_dir):
+    # (IlceID, path) of every prayer_times_{IlceID}.json, in file name order.
+    for filename in sorted(glob.glob(os.path.join(source_dir, "prayer_times_*.json"))):
+        match = PRAYER_TIMES_PATTERN.match(os.path.basename(filename))
+        if match:
+            yield match.group(1), filename
+
+class Record:
+    # Base for the API objects: one slot per field, in the API's field order,
+    # so to_dict() gives back exactly what from_dict() was given. Fields the
+    # class doesn't know are kept in `extra`; known fields that were missing
+    # read as None and are left out again by to_dict().
+    __slots__ = ("extra", "absent")
+    FIELDS = ()
+
+    def __init__(self, **values):
+        absent = []
+        for field in self.FIELDS:
+            if field not in values:
+                absent.append(field)
+            setattr(self, field, values.pop(field, None))
+        self.extra = values or None
+        self.absent = tuple(absent) or None
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+    @classmethod
+    def from_list(cls, items):
+        return [cls.from_dict(item) for item in items or []]
+
+    def to_dict(self):
+        absent = self.absent or ()
+        data = {field: getattr(self, field) for field in self.FIELDS if field not in absent}
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def __repr__(self):
+        return f"{type(self).__name__}({', '.join(f'{field}={getattr(self, field)!r}' for field in self.FIELDS)})"
+
+class Country(Record):
+    FIELDS = ("UlkeAdi", "UlkeAdiEn", "UlkeID")
+    __slots__ = FIELDS
+
+class City(Record):
+    FIELDS = ("SehirAdi", "SehirAdiEn", "SehirID")
+    __slots__ = FIELDS
+
+class District(Record):
+    FIELDS = ("IlceAdi", "IlceAdiEn", "IlceID")
+    __slots__ = FIELDS
+
+    @property
+    def id(self):
+        # Older answers used "kod" or "ID" instead of "IlceID".
+        return self.IlceID or (self.extra or {}).get("kod") or (self.extra or {}).get("ID")
+
+class TimesRow(Record):
+    FIELDS = tuple(timetable.ROW_FIELDS)
+    __slots__ = FIELDS
+
+    @property
+    def date(self):
+        return timetable.parse_date(self.MiladiTarihKisa)
+
+    def minutes(self, key):
+        return timetable.parse_minutes(getattr(self, key))
+
+def district_id(district):
+    # IlceID of a district dict or District.
+    if isinstance(district, District):
+        return district.id
+    return district.get("IlceID") or district.get("kod") or district.get("ID")
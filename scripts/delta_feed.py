@@ -0,0 +1,130 @@
+import argparse
+import datetime
+import hashlib
+import os
+import shutil
+import sys
+
+import data_io
+import timetable
+
+# Per-district deltas between two generations of prayer_times files, so
+# clients and mirrors can sync a few changed days instead of whole files.
+#
+#   python scripts/delta_feed.py snapshot   before the fetch: keep the current generation
+#   python scripts/delta_feed.py emit       after the fetch: write data/deltas/<generation>/
+#
+# A generation directory holds prayer_times_{IlceID}.json for every district
+# that changed, plus changelog.json. data/deltas/index.json lists the
+# generations that are still kept, oldest first. data/deltas/ isn't committed:
+# CI keeps it in the Actions cache between runs and publishes it with the
+# rest of data/ on GitHub Pages.
+
+script_dir = os.path.dirname(os.path.realpath(__file__))
+repo_root = os.path.abspath(os.path.join(script_dir, ".."))
+data_dir = os.path.join(repo_root, "data")
+SNAPSHOT_DIR = os.path.join(data_dir, ".cache", "previous_generation")
+DELTAS_DIR = os.path.join(data_dir, "deltas")
+KEEP_GENERATIONS = 10
+
+def file_hash(filename):
+    with open(filename, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def prayer_times_files(directory):
+    # IlceID -> path
+    return dict(data_io.iter_prayer_files(directory))
+
+def snapshot(source_dir=data_dir, snapshot_dir=SNAPSHOT_DIR):
+    if os.path.exists(snapshot_dir):
+        shutil.rmtree(snapshot_dir)
+    os.makedirs(snapshot_dir)
+    files = prayer_times_files(source_dir)
+    for filename in files.values():
+        shutil.copy2(filename, snapshot_dir)
+    print(f"Snapshot of {len(files)} prayer_times files in {snapshot_dir}")
+
+def diff_rows(old_rows, new_rows):
+    old = {row[timetable.DATE_KEY]: row for row in old_rows}
+    new = {row[timetable.DATE_KEY]: row for row in new_rows}
+    dropped = sorted((date for date in old if date not in new), key=timetable.parse_date)
+    changed = [row for date, row in new.items() if date in old and old[date] != row]
+    appended = [row for date, row in new.items() if date not in old]
+    return dropped, changed, appended
+
+def apply_delta(rows, delta):
+    # What a client does with a delta: drop, replace, then append rows, and
+    # keep them in date order.
+    by_date = {row[timetable.DATE_KEY]: row for row in rows}
+    for date in delta["dropped"]:
+        by_date.pop(date, None)
+    for row in delta["changed"] + delta["appended"]:
+        by_date[row[timetable.DATE_KEY]] = row
+    return sorted(by_date.values(), key=timetable.row_date)
+
+def prune(deltas_dir, generations, keep):
+    for generation in generations[:-keep]:
+        shutil.rmtree(os.path.join(deltas_dir, generation), ignore_errors=True)
+    return generations[-keep:]
+
+def emit(source_dir=data_dir, snapshot_dir=SNAPSHOT_DIR, deltas_dir=DELTAS_DIR, keep=KEEP_GENERATIONS):
+    if not os.path.isdir(snapshot_dir):
+        print(f"No previous generation in {snapshot_dir}; run 'snapshot' before fetching.")
+        return False
+
+    index_file = os.path.join(deltas_dir, "index.json")
+    index = data_io.load_json(index_file) if os.path.exists(index_file) else {"generations": []}
+    generation = datetime.datetime.now(datetime.timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    generation_dir = os.path.join(deltas_dir, generation)
+
+    old_files = prayer_times_files(snapshot_dir)
+    new_files = prayer_times_files(source_dir)
+    changelog = {
+        "generation": generation,
+        "previous_generation": index["generations"][-1] if index["generations"] else None,
+        "changed": [],
+        "added": [],
+        "removed": sorted((district_id for district_id in old_files if district_id not in new_files), key=int)
+    }
+
+    for district_id in sorted(new_files, key=int):
+        new_hash = file_hash(new_files[district_id])
+        old_hash = file_hash(old_files[district_id]) if district_id in old_files else None
+        if new_hash == old_hash:
+            continue
+        old_rows = data_io.load_json(old_files[district_id]) if old_hash else []
+        dropped, changed, appended = diff_rows(old_rows, data_io.load_json(new_files[district_id]))
+        os.makedirs(generation_dir, exist_ok=True)
+        data_io.save_json(os.path.join(generation_dir, f"prayer_times_{district_id}.json"), {
+            "IlceID": district_id,
+            # Clients should only apply the delta on top of this exact file.
+            "base_sha256": old_hash,
+            "sha256": new_hash,
+            "dropped": dropped,
+            "changed": changed,
+            "appended": appended
+        })
+        changelog["added" if old_hash is None else "changed"].append(district_id)
+
+    if not (changelog["changed"] or changelog["added"] or changelog["removed"]):
+        print("No prayer_times changes since the previous generation.")
+        return True
+
+    os.makedirs(generation_dir, exist_ok=True)
+    data_io.save_json(os.path.join(generation_dir, "changelog.json"), changelog)
+    index["generations"] = prune(deltas_dir, index["generations"] + [generation], keep)
+    data_io.save_json(index_file, index)
+    print(f"Generation {generation}: {len(changelog['changed'])} changed, "
+          f"{len(changelog['added'])} added, {len(changelog['removed'])} removed")
+    return True
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Emit per-district deltas between dataset generations.")
+    parser.add_argument("command", choices=["snapshot", "emit"])
+    parser.add_argument("--keep", type=int, default=KEEP_GENERATIONS,
+                        help="number of delta generations to keep")
+    args = parser.parse_args()
+    if args.command == "snapshot":
+        snapshot()
+    elif not emit(keep=args.keep):
+        sys.exit(1)
@@ -0,0 +1,229 @@
+import argparse
+import csv
+import glob
+import heapq
+import math
+import os
+import re
+import struct
+import sys
+
+import numpy as np
+
+import data_io
+
+# GPS -> nearest districts. Coordinates come from district_detail_{IlceID}.json
+# (the /ilce-detay answers, when upstream has them) and/or a gazetteer file,
+# and are stored as a k-d tree over points on the unit sphere, so straight-line
+# distance in 3D orders districts the same way great-circle distance does and
+# there is no trouble at the antimeridian or the poles.
+#
+#   python scripts/district_locator.py build --gazetteer districts.csv
+#   python scripts/district_locator.py nearest 41.01 28.97 -n 3
+#
+# A gazetteer is CSV or JSON (a list of objects) with an IlceID column and
+# latitude/longitude columns named lat/lon, latitude/longitude or
+# Enlem/Boylam.
+#
+# data/district_locations.bin (little-endian), format version 1:
+#   header, 12 bytes
+#     4s   magic b"PTKD"
+#     B    version (1)
+#     B    reserved (0)
+#     H    reserved (0)
+#     I    number of districts
+#   then one 16-byte node per district, in tree order: the root of the range
+#   [lo, hi) is at (lo + hi) // 2, its children cover [lo, mid) and
+#   [mid + 1, hi)
+#     I    IlceID
+#     f    latitude, degrees
+#     f    longitude, degrees
+#     B    split axis (0 = x, 1 = y, 2 = z)
+#     3x   padding
+
+script_dir = os.path.dirname(os.path.realpath(__file__))
+repo_root = os.path.abspath(os.path.join(script_dir, ".."))
+data_dir = os.path.join(repo_root, "data")
+DEFAULT_FILE = os.path.join(data_dir, "district_locations.bin")
+
+MAGIC = b"PTKD"
+VERSION = 1
+HEADER = struct.Struct("<4sBBHI")
+NODE_DTYPE = np.dtype([("IlceID", "<u4"), ("lat", "<f4"), ("lon", "<f4"), ("axis", "u1"), ("padding", "V3")])
+EARTH_RADIUS_KM = 6371.0
+
+DETAIL_PATTERN = re.compile(r"^district_detail_(\d+)\.json$")
+LATITUDE_KEYS = ("lat", "latitude", "Latitude", "Enlem", "enlem")
+LONGITUDE_KEYS = ("lon", "lng", "longitude", "Longitude", "Boylam", "boylam")
+
+def unit_vectors(lat, lon):
+    lat, lon = np.radians(lat), np.radians(lon)
+    return np.stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)], axis=-1)
+
+def chord_to_km(chord):
+    return 2 * math.asin(min(1.0, chord / 2)) * EARTH_RADIUS_KM
+
+def pick(record, keys):
+    for key in keys:
+        value = record.get(key)
+        if value not in (None, ""):
+            return float(value)
+    return None
+
+def read_coordinates(record):
+    # (lat, lon) from a detail answer or gazetteer row, or None.
+    if isinstance(record, list):
+        record = record[0] if record and isinstance(record[0], dict) else {}
+    if not isinstance(record, dict):
+        return None
+    lat, lon = pick(record, LATITUDE_KEYS), pick(record, LONGITUDE_KEYS)
+    if lat is None or lon is None or not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        return None
+    return lat, lon
+
+def load_gazetteer(filename):
+    if filename.lower().endswith(".json"):
+        records = data_io.load_json(filename)
+    else:
+        with open(filename, "r", encoding="utf-8", newline="") as f:
+            records = list(csv.DictReader(f))
+    found = {}
+    for record in records:
+        district_id = record.get("IlceID")
+        coordinates = read_coordinates(record)
+        if district_id and coordinates:
+            found[int(district_id)] = coordinates
+    return found
+
+def load_details(source_dir):
+    found = {}
+    for filename in glob.glob(os.path.join(source_dir, "district_detail_*.json")):
+        match = DETAIL_PATTERN.match(os.path.basename(filename))
+        if not match:
+            continue
+        try:
+            coordinates = read_coordinates(data_io.load_json(filename))
+        except (ValueError, TypeError):
+            continue
+        if coordinates:
+            found[int(match.group(1))] = coordinates
+    return found
+
+def build_tree(points):
+    # Returns the node order and split axes for `points` (n x 3): each range
+    # is sorted on its widest axis and split at the median.
+    order = np.arange(len(points))
+    axes = np.zeros(len(points), dtype=np.uint8)
+    ranges = [(0, len(points))]
+    while ranges:
+        lo, hi = ranges.pop()
+        if hi - lo <= 0:
+            continue
+        segment = order[lo:hi]
+        spread = points[segment].max(axis=0) - points[segment].min(axis=0)
+        axis = int(np.argmax(spread))
+        order[lo:hi] = segment[np.argsort(points[segment, axis], kind="stable")]
+        mid = (lo + hi) // 2
+        axes[mid] = axis
+        ranges.append((lo, mid))
+        ranges.append((mid + 1, hi))
+    return order, axes
+
+def build(path=DEFAULT_FILE, source_dir=data_dir, gazetteer=None):
+    coordinates = load_details(source_dir)
+    from_details = len(coordinates)
+    if gazetteer:
+        # The gazetteer fills in what the detail files don't have.
+        for district_id, value in load_gazetteer(gazetteer).items():
+            coordinates.setdefault(district_id, value)
+    if not coordinates:
+        print("No district coordinates found; pass --gazetteer or fetch /ilce-detay first.")
+        return False
+
+    ids = np.array(sorted(coordinates), dtype=np.uint32)
+    lat = np.array([coordinates[i][0] for i in ids.tolist()], dtype=np.float32)
+    lon = np.array([coordinates[i][1] for i in ids.tolist()], dtype=np.float32)
+    order, axes = build_tree(unit_vectors(lat.astype(np.float64), lon.astype(np.float64)))
+
+    nodes = np.zeros(len(ids), dtype=NODE_DTYPE)
+    nodes["IlceID"], nodes["lat"], nodes["lon"], nodes["axis"] = ids[order], lat[order], lon[order], axes
+    payload = HEADER.pack(MAGIC, VERSION, 0, 0, len(nodes)) + nodes.tobytes()
+    if not data_io.write_if_changed(path, payload):
+        print(f"Unchanged: {path}")
+        return True
+    print(f"Wrote {path}: {len(nodes)} districts ({from_details} from detail files)")
+    return True
+
+class DistrictLocator:
+    def __init__(self, path=DEFAULT_FILE):
+        with open(path, "rb") as f:
+            payload = f.read()
+        magic, version, _, _, count = HEADER.unpack_from(payload, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} district location index")
+        nodes = np.frombuffer(payload, dtype=NODE_DTYPE, count=count, offset=HEADER.size)
+        # Plain lists: the search touches a handful of nodes, where NumPy
+        # scalar access would cost more than it saves.
+        self.ids = nodes["IlceID"].tolist()
+        self.coordinates = list(zip(nodes["lat"].tolist(), nodes["lon"].tolist()))
+        self.points = [tuple(point) for point in
+                       unit_vectors(nodes["lat"].astype(np.float64), nodes["lon"].astype(np.float64)).tolist()]
+        self.axes = nodes["axis"].tolist()
+
+    def __len__(self):
+        return len(self.ids)
+
+    def nearest(self, lat, lon, count=1):
+        # The `count` closest districts as [(IlceID, distance in km)], nearest
+        # first.
+        if count < 1:
+            return []
+        target = tuple(unit_vectors(np.float64(lat), np.float64(lon)).tolist())
+        best = []  # max-heap of (-squared chord, IlceID)
+        points, axes, ids = self.points, self.axes, self.ids
+
+        def visit(lo, hi):
+            if lo >= hi:
+                return
+            mid = (lo + hi) // 2
+            point = points[mid]
+            dx, dy, dz = point[0] - target[0], point[1] - target[1], point[2] - target[2]
+            distance = dx * dx + dy * dy + dz * dz
+            if len(best) < count:
+                heapq.heappush(best, (-distance, ids[mid]))
+            elif distance < -best[0][0]:
+                heapq.heapreplace(best, (-distance, ids[mid]))
+            axis = axes[mid]
+            diff = target[axis] - point[axis]
+            if diff < 0:
+                visit(lo, mid)
+                if len(best) < count or diff * diff < -best[0][0]:
+                    visit(mid + 1, hi)
+            else:
+                visit(mid + 1, hi)
+                if len(best) < count or diff * diff < -best[0][0]:
+                    visit(lo, mid)
+
+        visit(0, len(points))
+        return [(str(district_id), chord_to_km(math.sqrt(-distance)))
+                for distance, district_id in sorted(best, reverse=True)]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Nearest-district lookup by GPS coordinates.")
+    parser.add_argument("--file", default=DEFAULT_FILE)
+    commands = parser.add_subparsers(dest="command", required=True)
+    build_parser = commands.add_parser("build", help="build the index from detail files and/or a gazetteer")
+    build_parser.add_argument("--data-dir", default=data_dir)
+    build_parser.add_argument("--gazetteer", default=None, help="CSV or JSON with IlceID and coordinates")
+    nearest_parser = commands.add_parser("nearest", help="print the districts closest to LAT LON")
+    nearest_parser.add_argument("lat", type=float)
+    nearest_parser.add_argument("lon", type=float)
+    nearest_parser.add_argument("-n", "--count", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        if not build(args.file, args.data_dir, args.gazetteer):
+            sys.exit(1)
+    else:
+        for district_id, distance in DistrictLocator(args.file).nearest(args.lat, args.lon, args.count):
+            print(f"{district_id}\t{distance:.1f} km")
@@ -0,0 +1,111 @@
+import argparse
+import datetime
+import os
+import struct
+import sys
+
+import data_io
+import timetable
+
+# Packs every prayer_times_{IlceID}.json into prayer_times_{IlceID}.bin next
+# to it: a few hundred bytes the watch can parse without a JSON decoder.
+#
+# Layout (little-endian), format version 1:
+#   header, 20 bytes
+#     4s   magic b"PTBN"
+#     B    version (1)
+#     B    prayers per day (6, in timetable.PRAYER_KEYS order)
+#     H    number of days
+#     I    IlceID
+#     I    first date, as days since 1970-01-01
+#     H    Hijri year of the first day
+#     B    Hijri month of the first day
+#     B    reserved (0)
+#   then one 14-byte record per consecutive day
+#     b    UTC offset of the day, in quarter hours
+#     B    Hijri day of month; the Hijri month/year advance whenever it
+#          drops back, since Hijri months are 29 or 30 days long
+#     6H   prayer times, minutes since local midnight
+
+MAGIC = b"PTBN"
+VERSION = 1
+HEADER = struct.Struct("<4sBBHIIHBB")
+EPOCH = datetime.date(1970, 1, 1)
+
+def pack_district(district_id, rows):
+    day = struct.Struct(f"<bB{len(timetable.PRAYER_KEYS)}H")
+    rows = sorted(rows, key=timetable.row_date)
+    first = timetable.row_date(rows[0])
+    hijri_year, hijri_month, _ = timetable.parse_hijri(rows[0]["HicriTarihKisa"])
+
+    parts = [HEADER.pack(MAGIC, VERSION, len(timetable.PRAYER_KEYS), len(rows), int(district_id),
+                         (first - EPOCH).days, hijri_year, hijri_month, 0)]
+    for index, row in enumerate(rows):
+        if timetable.row_date(row) != first + datetime.timedelta(days=index):
+            raise ValueError(f"dates are not consecutive at {row[timetable.DATE_KEY]}")
+        offset = timetable.utc_offset_minutes(row)
+        if offset % 15:
+            raise ValueError(f"UTC offset {offset} is not a multiple of 15 minutes")
+        _, _, hijri_day = timetable.parse_hijri(row["HicriTarihKisa"])
+        minutes = [timetable.parse_minutes(row[key]) for key in timetable.PRAYER_KEYS]
+        parts.append(day.pack(offset // 15, hijri_day, *minutes))
+    return b"".join(parts)
+
+def unpack_district(payload):
+    # Decodes a .bin file back into a list of plain dicts, mostly for checking
+    # the exporter; the watch has its own reader.
+    magic, version, prayer_count, day_count, district_id, first_day, hijri_year, hijri_month, _ = \
+        HEADER.unpack_from(payload, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"not a version {VERSION} prayer times file")
+    day = struct.Struct(f"<bB{prayer_count}H")
+    first = EPOCH + datetime.timedelta(days=first_day)
+
+    days = []
+    previous_hijri_day = None
+    for index in range(day_count):
+        quarters, hijri_day, *minutes = day.unpack_from(payload, HEADER.size + index * day.size)
+        if previous_hijri_day is not None and hijri_day < previous_hijri_day:
+            hijri_month += 1
+            if hijri_month > 12:
+                hijri_month = 1
+                hijri_year += 1
+        previous_hijri_day = hijri_day
+        days.append({
+            "IlceID": str(district_id),
+            "date": first + datetime.timedelta(days=index),
+            "hijri": (hijri_year, hijri_month, hijri_day),
+            "utc_offset_minutes": quarters * 15,
+            "times": dict(zip(timetable.PRAYER_KEYS, minutes)),
+        })
+    return days
+
+def export_file(district_id, filename):
+    # Returns False, without touching the .bin file, when it already holds
+    # these bytes.
+    payload = pack_district(district_id, data_io.load_json(filename))
+    return data_io.write_if_changed(filename[:-len(".json")] + ".bin", payload)
+
+def main(data_dir):
+    written = skipped = failed = 0
+    for district_id, filename in data_io.iter_prayer_files(data_dir):
+        try:
+            if export_file(district_id, filename):
+                written += 1
+            else:
+                skipped += 1
+        except (ValueError, KeyError, IndexError, struct.error) as e:
+            print(f"Could not pack {filename}: {e}")
+            failed += 1
+    print(f"Binary export: {written} written, {skipped} unchanged, {failed} failed")
+    return failed == 0
+
+if __name__ == "__main__":
+    script_dir = os.path.dirname(os.path.realpath(__file__))
+    repo_root = os.path.abspath(os.path.join(script_dir, ".."))
+
+    parser = argparse.ArgumentParser(description="Pack prayer_times_*.json into compact .bin files for the watch.")
+    parser.add_argument("--data-dir", default=os.path.join(repo_root, "data"))
+    args = parser.parse_args()
+    if not main(args.data_dir):
+        sys.exit(1)
@@ -1,8 +1,18 @@
-import requests
+import argparse
 import os
-import json
+import sys
+from concurrent.futures import ThreadPoolExecutor
 
-BASE_URL = "https://ezanvakti.emushaf.net"
+import crawl_journal
+import data_io
+import http_client
+import negative_cache
+import pipeline_metrics
+import refresh_state
+
+# Overridable so the scripts can run against mock_api.py.
+BASE_URL = os.environ.get("EZANVAKTI_BASE_URL", "https://ezanvakti.emushaf.net")
+DEFAULT_CONCURRENCY = 16
 
 # Determine repository root: one level up from this script's folder.
 script_dir = os.path.dirname(os.path.realpath(__file__))
@@ -10,81 +20,308 @@ repo_root = os.path.abspath(os.path.join(script_dir, ".."))
 data_dir = os.path.join(repo_root, "data")
 os.makedirs(data_dir, exist_ok=True)
 
-def load_json(filename):
-    with open(filename, "r", encoding="utf-8") as f:
-        return json.load(f)
+# One client for the whole crawl, so TLS connections are kept alive and reused
+# and all workers share the same rate limit and retry budget.
+client = http_client.RequestClient()
+
+# "missing" only fetches files that don't exist yet, "force" refetches
+# everything and "incremental" refetches what the refresh state says is due.
+REFRESH_MODES = ("missing", "incremental", "force")
+refresh_mode = "missing"
+state = None
+journal = None
+negative = None
+
+def load_existing(filename):
+    # None when the file is missing or unreadable (e.g. truncated by a crash
+    # before saves were atomic), so it gets fetched again.
+    if not os.path.exists(filename):
+        return None
+    try:
+        return data_io.load_json(filename)
+    except ValueError:
+        return None
+
+def record_failure(endpoint, error):
+    # 4xx answers and bodies that aren't JSON won't get better on a retry;
+    # everything else (network, 5xx, exhausted retries) might.
+    response = getattr(error, "response", None)
+    if response is not None and 400 <= response.status_code < 500:
+        permanent = True
+        if negative:
+            negative.record(endpoint, response.status_code, f"http_{response.status_code}")
+    elif isinstance(error, ValueError):
+        permanent = True
+        if negative:
+            negative.record(endpoint, 200, "invalid")
+    else:
+        permanent = False
+    if journal:
+        journal.mark(endpoint, "absent" if permanent else "failed", error=error)
+
+def remember_result(endpoint, data):
+    if negative is None:
+        return
+    reason = negative_cache.classify(data)
+    if reason:
+        negative.record(endpoint, 200, reason)
+    else:
+        negative.discard(endpoint)
+
+def negatively_cached(endpoint, filename):
+    entry = negative.lookup(endpoint) if negative else None
+    if entry is None:
+        return False
+    skip(filename, f"negative cache: {entry['reason']}")
+    if journal:
+        journal.mark(endpoint, "absent", filename)
+    return True
 
 def fetch_json(endpoint):
     url = BASE_URL + endpoint
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-        data = response.json()
+        data = client.get_json(url)
         validate_json_structure(data, name=endpoint)
+        remember_result(endpoint, data)
         return data
     except Exception as e:
         print(f"Error fetching {url}: {e}")
+        record_failure(endpoint, e)
         return None
 
+def fetch_conditional(endpoint, headers=None):
+    # Like fetch_json, but returns the response too so the caller can read
+    # validators and tell a 304 apart from new content.
+    url = BASE_URL + endpoint
+    try:
+        response = client.get(url, headers=headers)
+        if response.status_code == 304:
+            return response, None
+        data = response.json()
+        validate_json_structure(data, name=endpoint)
+        remember_result(endpoint, data)
+        return response, data
+    except Exception as e:
+        print(f"Error fetching {url}: {e}")
+        record_failure(endpoint, e)
+        return None, None
+
 def validate_json_structure(data, name="Data"):
     if isinstance(data, dict):
-        print(f"[VALID] {name}: JSON object with keys: {list(data.keys())}")
+        pipeline_metrics.log(f"[VALID] {name}: JSON object with keys: {list(data.keys())}")
     elif isinstance(data, list):
-        print(f"[VALID] {name}: JSON array with {len(data)} items")
+        pipeline_metrics.log(f"[VALID] {name}: JSON array with {len(data)} items")
         if data and isinstance(data[0], dict):
-            print(f"  Example item keys: {list(data[0].keys())}")
+            pipeline_metrics.log(f"  Example item keys: {list(data[0].keys())}")
     else:
         print(f"[INVALID] {name}: Unexpected JSON type {type(data)}")
 
+def write_payload(filename, payload):
+    data_io.atomic_write(filename, payload)
+    kind = pipeline_metrics.file_kind(filename)
+    pipeline_metrics.inc("files_written_total", kind=kind)
+    pipeline_metrics.inc("bytes_out_total", len(payload), kind=kind)
+    pipeline_metrics.log(f"Saved data to {filename}")
+
+def skip(filename, reason):
+    pipeline_metrics.inc("files_skipped_total", kind=pipeline_metrics.file_kind(filename), reason=reason)
+    pipeline_metrics.log(f"Skipping {filename} ({reason})")
+
 def save_json(filename, data):
-    with open(filename, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-    print(f"Saved data to {filename}")
+    write_payload(filename, data_io.dumps(data))
 
 def fetch_and_save(endpoint, filename):
-    if os.path.exists(filename):
-        print(f"Skipping {filename} (already exists)")
-        return load_json(filename)
+    if journal is None:
+        return fetch_or_refresh(endpoint, filename)
+    status = journal.status(endpoint)
+    if status in ("done", "absent"):
+        current = load_existing(filename)
+        if current is not None or status == "absent":
+            skip(filename, f"{status} in journal")
+            return current
+    journal.mark(endpoint, "pending", filename)
+    data = fetch_or_refresh(endpoint, filename)
+    # Failures were recorded by fetch_json / fetch_conditional.
+    if journal.status(endpoint) == "pending":
+        journal.mark(endpoint, "done", filename)
+    return data
+
+def fetch_or_refresh(endpoint, filename):
+    if refresh_mode == "incremental":
+        return refresh_and_save(endpoint, filename)
+    if refresh_mode != "force":
+        current = load_existing(filename)
+        if current is not None:
+            skip(filename, "already exists")
+            return current
+        # "force" asks known-empty endpoints again too.
+        if negatively_cached(endpoint, filename):
+            return None
     data = fetch_json(endpoint)
     if data:
         save_json(filename, data)
     return data
 
-def main():
+def refresh_and_save(endpoint, filename):
+    current = load_existing(filename)
+    if current is not None and not state.is_due(endpoint, current):
+        skip(filename, "still fresh")
+        return current
+    if negatively_cached(endpoint, filename):
+        return current
+
+    headers = state.validators(endpoint) if current is not None else None
+    response, data = fetch_conditional(endpoint, headers)
+    if response is None:
+        # Keep serving the copy we have rather than dropping it.
+        return current
+    if response.status_code == 304:
+        skip(filename, "not modified")
+        state.record(endpoint, response.headers)
+        return current
+    if not data:
+        return current
+
+    payload = data_io.dumps(data)
+    sha256 = refresh_state.content_hash(payload)
+    # Only touch the file when its content changed, to keep git diffs small.
+    if current is None or sha256 != refresh_state.file_hash(filename):
+        write_payload(filename, payload)
+    else:
+        skip(filename, "unchanged")
+    state.record(endpoint, response.headers, sha256)
+    return data
+
+def add_pending(endpoints):
+    if journal is not None:
+        journal.add_pending(endpoints)
+
+def crawl_concurrent(concurrency=DEFAULT_CONCURRENCY):
+    # Same endpoints and files as the sequential walk in main(), but each level
+    # of the hierarchy is fetched for all parents at once on a bounded pool.
+    client.configure_pool(concurrency)
+
+    # 1. Fetch Countries
+    countries = fetch_and_save("/ulkeler", os.path.join(data_dir, "countries.json"))
+    if not countries:
+        print("No countries data.")
+        return
+
+    country_ids = [country.UlkeID for country in data_io.Country.from_list(countries) if country.UlkeID]
+    add_pending([(f"/sehirler/{country_id}", f"cities_{country_id}.json") for country_id in country_ids])
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        # 2. Fetch Cities for every Country
+        city_lists = pool.map(
+            lambda country_id: fetch_and_save(f"/sehirler/{country_id}", os.path.join(data_dir, f"cities_{country_id}.json")),
+            country_ids,
+        )
+        city_ids = [city.SehirID for cities in city_lists for city in data_io.City.from_list(cities) if city.SehirID]
+        pipeline_metrics.log(f"Fetching districts for {len(city_ids)} cities with {concurrency} workers")
+        add_pending([(f"/ilceler/{city_id}", f"districts_{city_id}.json") for city_id in city_ids])
+
+        # 3. Fetch Districts for every City
+        district_lists = pool.map(
+            lambda city_id: fetch_and_save(f"/ilceler/{city_id}", os.path.join(data_dir, f"districts_{city_id}.json")),
+            city_ids,
+        )
+        district_ids = []
+        for districts in district_lists:
+            for district in data_io.District.from_list(districts):
+                district_id = district.id
+                if not district_id:
+                    pipeline_metrics.log(f"    No district ID found for: {district.to_dict()}")
+                    continue
+                district_ids.append(district_id)
+        pipeline_metrics.log(f"Fetching details and prayer times for {len(district_ids)} districts")
+        add_pending([(f"/{prefix}/{district_id}", f"{name}_{district_id}.json") for district_id in district_ids
+                     for prefix, name in (("ilce-detay", "district_detail"), ("vakitler", "prayer_times"))])
+
+        # 4. + 5. Fetch District Details and Prayer Times for every District
+        jobs = []
+        for district_id in district_ids:
+            jobs.append(pool.submit(fetch_and_save, f"/ilce-detay/{district_id}", os.path.join(data_dir, f"district_detail_{district_id}.json")))
+            jobs.append(pool.submit(fetch_and_save, f"/vakitler/{district_id}", os.path.join(data_dir, f"prayer_times_{district_id}.json")))
+        for job in jobs:
+            job.result()
+
+def main(concurrency=1, refresh="missing", list_max_age_days=refresh_state.LIST_MAX_AGE_DAYS,
+         min_coverage_days=refresh_state.MIN_COVERAGE_DAYS, resume=False,
+         negative_ttl_days=negative_cache.TTL_DAYS):
+    global refresh_mode, state, journal, negative
+    refresh_mode = refresh
+    negative = None
+    if negative_ttl_days > 0:
+        negative = negative_cache.NegativeCache(os.path.join(data_dir, negative_cache.CACHE_FILENAME),
+                                                negative_ttl_days)
+    if refresh == "incremental":
+        state = refresh_state.RefreshState(os.path.join(data_dir, refresh_state.STATE_FILENAME),
+                                           list_max_age_days, min_coverage_days)
+    # Without --resume the journal starts empty and replaces the old one.
+    journal = crawl_journal.CrawlJournal(os.path.join(data_dir, crawl_journal.JOURNAL_FILE), resume)
+    if resume:
+        pipeline_metrics.log(f"Resuming: {len(journal.unfinished())} unfinished endpoints in {journal.path}")
+
+    try:
+        with pipeline_metrics.stage("fetch"):
+            if concurrency > 1:
+                crawl_concurrent(concurrency)
+            else:
+                crawl_sequential()
+    finally:
+        # Also on Ctrl-C / SystemExit, so --resume can pick up from here.
+        counts = journal.finish()
+        if state:
+            state.save()
+        if negative:
+            negative.prune()
+            negative.save()
+
+    client.report()
+    print("Journal: " + ", ".join(f"{count} {status}" for status, count in sorted(counts.items())))
+    if counts.get("failed") or counts.get("pending"):
+        print(f"Rerun with --resume to retry the unfinished endpoints in {journal.path}")
+    # A hole in the data should fail the run rather than be committed.
+    failures = client.master_data_failures()
+    if failures:
+        print(f"Master data is incomplete: {len(failures)} country, city or district lists failed after retries")
+    return not client.exhausted
+
+def crawl_sequential():
     # 1. Fetch Countries
     countries = fetch_and_save("/ulkeler", os.path.join(data_dir, "countries.json"))
     if not countries:
         print("No countries data.")
         return
     
-    for country in countries:
-        country_id = country.get("UlkeID")
+    for country in data_io.Country.from_list(countries):
+        country_id = country.UlkeID
         if not country_id:
             continue
-        print(f"Processing country {country.get('UlkeAdiEn', country.get('UlkeAdi'))} with ID: {country_id}")
+        pipeline_metrics.log(f"Processing country {country.UlkeAdiEn or country.UlkeAdi} with ID: {country_id}")
         
         # 2. Fetch Cities for the Country
         cities = fetch_and_save(f"/sehirler/{country_id}", os.path.join(data_dir, f"cities_{country_id}.json"))
         if not cities:
             continue
         
-        for city in cities:
-            city_id = city.get("SehirID")
+        for city in data_io.City.from_list(cities):
+            city_id = city.SehirID
             if not city_id:
                 continue
-            print(f"  Processing city {city.get('SehirAdiEn', city.get('SehirAdi'))} with ID: {city_id}")
+            pipeline_metrics.log(f"  Processing city {city.SehirAdiEn or city.SehirAdi} with ID: {city_id}")
             
             # 3. Fetch Districts for the City
             districts = fetch_and_save(f"/ilceler/{city_id}", os.path.join(data_dir, f"districts_{city_id}.json"))
             if not districts:
                 continue
             
-            for district in districts:
-                district_id = district.get("IlceID") or district.get("kod") or district.get("ID")
+            for district in data_io.District.from_list(districts):
+                district_id = district.id
                 if not district_id:
-                    print(f"    No district ID found for: {district}")
+                    pipeline_metrics.log(f"    No district ID found for: {district.to_dict()}")
                     continue
-                print(f"    Processing district with ID: {district_id}")
+                pipeline_metrics.log(f"    Processing district with ID: {district_id}")
                 
                 # 4. Fetch District Details
                 details = fetch_and_save(f"/ilce-detay/{district_id}", os.path.join(data_dir, f"district_detail_{district_id}.json"))
@@ -96,4 +333,34 @@ def main():
             # bayram = fetch_and_save(f"/bayram-namazi/{city_id}", os.path.join(data_dir, f"bayram_{city_id}.json"))
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Fetch prayer times data from the ezanvakti API.")
+    parser.add_argument("--concurrency", type=int, default=1,
+                        help=f"number of parallel requests; 1 walks the hierarchy sequentially (try {DEFAULT_CONCURRENCY})")
+    parser.add_argument("--rate", type=float, default=http_client.DEFAULT_RATE,
+                        help="maximum requests per second (0 disables the limit)")
+    parser.add_argument("--max-retries", type=int, default=http_client.DEFAULT_MAX_RETRIES,
+                        help="retries per request for 429/5xx and network errors")
+    parser.add_argument("--retry-budget", type=int, default=http_client.DEFAULT_RETRY_BUDGET,
+                        help="total retries allowed for the whole run")
+    parser.add_argument("--refresh", choices=REFRESH_MODES, default="missing",
+                        help="missing: fetch absent files only; incremental: refetch what is due; force: refetch everything")
+    parser.add_argument("--incremental", dest="refresh", action="store_const", const="incremental",
+                        help="shorthand for --refresh incremental")
+    parser.add_argument("--list-max-age-days", type=int, default=refresh_state.LIST_MAX_AGE_DAYS,
+                        help="incremental: revalidate country/city/district lists after this many days")
+    parser.add_argument("--min-coverage-days", type=int, default=refresh_state.MIN_COVERAGE_DAYS,
+                        help="incremental: refetch prayer times with fewer days than this left")
+    parser.add_argument("--resume", action="store_true",
+                        help="continue an interrupted crawl: skip what the journal has as done, retry the rest")
+    parser.add_argument("--negative-ttl-days", type=float, default=negative_cache.TTL_DAYS,
+                        help="skip endpoints that were empty or 4xx for this long (0 disables the negative cache)")
+    pipeline_metrics.add_arguments(parser)
+    args = parser.parse_args()
+    pipeline_metrics.apply_arguments(args)
+    client = http_client.RequestClient(rate=args.rate, max_retries=args.max_retries, retry_budget=args.retry_budget)
+    if not main(concurrency=args.concurrency, refresh=args.refresh, list_max_age_days=args.list_max_age_days,
+                min_coverage_days=args.min_coverage_days, resume=args.resume,
+                negative_ttl_days=args.negative_ttl_days):
+        pipeline_metrics.finish(args)
+        sys.exit(1)
+    pipeline_metrics.finish(args)
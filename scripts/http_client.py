@@ -0,0 +1,174 @@
+import email.utils
+import random
+import threading
+import time
+import urllib.parse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import pipeline_metrics
+
+# Shared request layer for the fetch scripts: one keep-alive session, a token
+# bucket so we never exceed the request rate the upstream host tolerates, and
+# retries with exponential backoff + jitter for transient failures.
+
+REQUEST_TIMEOUT = 30
+DEFAULT_RATE = 10.0          # requests per second, across all workers
+DEFAULT_BURST = 20
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_RETRY_BUDGET = 500   # total retries allowed per run
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 60.0
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# The country, city and district lists the rest of the hierarchy hangs off:
+# losing one of these drops whole regions from the data, not just one file.
+MASTER_DATA_ENDPOINTS = {"/ulkeler", "/sehirler", "/ilceler"}
+
+
+class TokenBucket:
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        # Blocks until a token is available.
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def parse_retry_after(value):
+    # Retry-After is either a number of seconds or an HTTP date.
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+def endpoint_label(url):
+    # "https://host/vakitler/9541" -> "/vakitler", so metrics don't get one
+    # series per district.
+    path = urllib.parse.urlsplit(url).path
+    return "/" + path.strip("/").split("/", 1)[0]
+
+
+class RetryableError(Exception):
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class RequestClient:
+    def __init__(self, rate=DEFAULT_RATE, burst=DEFAULT_BURST, max_retries=DEFAULT_MAX_RETRIES,
+                 retry_budget=DEFAULT_RETRY_BUDGET, timeout=REQUEST_TIMEOUT, pool_size=10):
+        self.session = requests.Session()
+        self.bucket = TokenBucket(rate, burst) if rate and rate > 0 else None
+        self.max_retries = max_retries
+        self.retry_budget = retry_budget
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        # When the host asks us to back off (429/503 + Retry-After), every
+        # worker waits, not only the one that got the response.
+        self.paused_until = 0.0
+        self.retries_used = 0
+        self.exhausted = []
+        self.configure_pool(pool_size)
+
+    def configure_pool(self, pool_size):
+        # The default adapter keeps only 10 connections per host; size the pool
+        # to the number of workers so concurrent requests don't discard them.
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def take_retry(self):
+        with self.lock:
+            if self.retries_used >= self.retry_budget:
+                return False
+            self.retries_used += 1
+            return True
+
+    def pause(self, seconds):
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def wait_turn(self):
+        while True:
+            with self.lock:
+                wait = self.paused_until - time.monotonic()
+            if wait <= 0:
+                break
+            time.sleep(wait)
+        if self.bucket:
+            self.bucket.acquire()
+
+    def send(self, url, headers=None):
+        self.wait_turn()
+        endpoint = endpoint_label(url)
+        started = time.perf_counter()
+        try:
+            response = self.session.get(url, headers=headers, timeout=self.timeout)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            pipeline_metrics.inc("http_errors_total", endpoint=endpoint, kind=type(e).__name__)
+            raise RetryableError(str(e))
+        pipeline_metrics.observe("http_request_duration_seconds", time.perf_counter() - started, endpoint=endpoint)
+        pipeline_metrics.inc("http_requests_total", endpoint=endpoint, status=str(response.status_code))
+        pipeline_metrics.inc("http_bytes_in_total", len(response.content), endpoint=endpoint)
+        if response.status_code in RETRY_STATUSES:
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            raise RetryableError(f"{response.status_code} {response.reason} for url: {url}", retry_after)
+        response.raise_for_status()
+        return response
+
+    def get(self, url, headers=None):
+        attempt = 0
+        while True:
+            try:
+                return self.send(url, headers)
+            except RetryableError as e:
+                if attempt >= self.max_retries or not self.take_retry():
+                    pipeline_metrics.inc("http_gave_up_total", endpoint=endpoint_label(url))
+                    with self.lock:
+                        self.exhausted.append(url)
+                    raise requests.HTTPError(f"giving up after {attempt + 1} attempts: {e}")
+                # Full jitter: sleep a random time up to the exponential cap,
+                # but never less than what the server asked for.
+                delay = random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+                if e.retry_after is not None:
+                    delay = max(delay, min(e.retry_after, BACKOFF_CAP * 5))
+                    self.pause(delay)
+                pipeline_metrics.inc("http_retries_total", endpoint=endpoint_label(url))
+                pipeline_metrics.log(f"Retrying {url} in {delay:.1f}s ({e})")
+                time.sleep(delay)
+                attempt += 1
+
+    def get_json(self, url, headers=None):
+        return self.get(url, headers).json()
+
+    def master_data_failures(self):
+        return [url for url in self.exhausted if endpoint_label(url) in MASTER_DATA_ENDPOINTS]
+
+    def report(self):
+        print(f"Retries used: {self.retries_used}/{self.retry_budget}")
+        if self.exhausted:
+            print(f"{len(self.exhausted)} requests failed after retries:")
+            for url in self.exhausted:
+                print(f"  {url}")
@@ -0,0 +1,211 @@
+import argparse
+import datetime
+import mmap
+import os
+import struct
+import sys
+
+import numpy as np
+
+import data_io
+import timetable
+
+# All prayer_times files in one fixed-layout binary file that readers mmap
+# instead of parsing JSON: opening it costs a few page faults, lookups return
+# views into the mapping, and every process reading it shares the page cache.
+#
+# Layout (little-endian), format version 1:
+#   header, 16 bytes
+#     4s   magic b"PTDS"
+#     B    version (1)
+#     B    prayers per day (6, in timetable.PRAYER_KEYS order)
+#     H    reserved (0)
+#     I    number of districts
+#     I    total number of days over all districts
+#   district table, one 16-byte entry per district, sorted by IlceID
+#     I    IlceID
+#     i    first date, as days since 1970-01-01
+#     H    number of consecutive days
+#     H    reserved (0)
+#     I    index of the district's first day in the arrays below
+#   minutes, total days x prayers x uint16: minutes since local midnight
+#   UTC offsets, total days x int16: the day's offset in minutes
+#
+#   python scripts/mapped_dataset.py build
+#   python scripts/mapped_dataset.py times 9541 2025-11-23 [2025-11-30]
+
+script_dir = os.path.dirname(os.path.realpath(__file__))
+repo_root = os.path.abspath(os.path.join(script_dir, ".."))
+data_dir = os.path.join(repo_root, "data")
+DEFAULT_FILE = os.path.join(data_dir, "prayer_times.bin")
+
+MAGIC = b"PTDS"
+VERSION = 1
+HEADER = struct.Struct("<4sBBHII")
+TABLE_DTYPE = np.dtype([("IlceID", "<u4"), ("first_day", "<i4"), ("day_count", "<u2"),
+                        ("reserved", "<u2"), ("start", "<u4")])
+EPOCH = datetime.date(1970, 1, 1)
+
+def encode_district(rows):
+    # (first date, minutes array, offsets array) for consecutive daily rows.
+    rows = sorted(rows, key=timetable.row_date)
+    first = timetable.row_date(rows[0])
+    for index, row in enumerate(rows):
+        if timetable.row_date(row) != first + datetime.timedelta(days=index):
+            raise ValueError(f"dates are not consecutive at {row[timetable.DATE_KEY]}")
+    minutes = np.array([[timetable.parse_minutes(row[key]) for key in timetable.PRAYER_KEYS] for row in rows],
+                       dtype="<u2")
+    offsets = np.array([timetable.utc_offset_minutes(row) for row in rows], dtype="<i2")
+    return first, minutes, offsets
+
+def build(path=DEFAULT_FILE, source_dir=data_dir):
+    districts = []
+    failed = 0
+    for district_id, filename in data_io.iter_prayer_files(source_dir):
+        try:
+            rows = data_io.load_json(filename)
+            if rows:
+                districts.append((int(district_id), *encode_district(rows)))
+        except (ValueError, KeyError, TypeError) as e:
+            print(f"Could not pack {filename}: {e}")
+            failed += 1
+    districts.sort(key=lambda district: district[0])
+
+    table = np.zeros(len(districts), dtype=TABLE_DTYPE)
+    start = 0
+    for index, (district_id, first, minutes, _) in enumerate(districts):
+        table[index] = (district_id, (first - EPOCH).days, len(minutes), 0, start)
+        start += len(minutes)
+    empty_minutes = np.zeros((0, len(timetable.PRAYER_KEYS)), dtype="<u2")
+    minutes = np.concatenate([district[2] for district in districts] or [empty_minutes])
+    offsets = np.concatenate([district[3] for district in districts] or [np.zeros(0, dtype="<i2")])
+
+    payload = b"".join([HEADER.pack(MAGIC, VERSION, len(timetable.PRAYER_KEYS), 0, len(districts), start),
+                        table.tobytes(), minutes.tobytes(), offsets.tobytes()])
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            if f.read() == payload:
+                print(f"Unchanged: {path}")
+                return failed == 0
+    data_io.atomic_write(path, payload)
+    print(f"Wrote {path}: {len(districts)} districts, {start} days, {len(payload)} bytes, {failed} failed")
+    return failed == 0
+
+class MappedDataset:
+    # Read-only view of a prayer_times.bin file. Every array it returns is a
+    # view into the mapping, valid until close().
+
+    def __init__(self, path=DEFAULT_FILE):
+        with open(path, "rb") as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, prayer_count, _, district_count, day_count = HEADER.unpack_from(self.mm, 0)
+        if magic != MAGIC or version != VERSION:
+            self.mm.close()
+            raise ValueError(f"{path} is not a version {VERSION} prayer times dataset")
+        self.prayer_count = prayer_count
+        offset = HEADER.size
+        self.table = np.frombuffer(self.mm, dtype=TABLE_DTYPE, count=district_count, offset=offset)
+        offset += self.table.nbytes
+        self.minutes = np.frombuffer(self.mm, dtype="<u2", count=day_count * prayer_count,
+                                     offset=offset).reshape(day_count, prayer_count)
+        offset += self.minutes.nbytes
+        self.utc_offsets = np.frombuffer(self.mm, dtype="<i2", count=day_count, offset=offset)
+
+    def close(self):
+        # Fails with BufferError while the caller still holds views from
+        # times() / times_view().
+        self.table = self.minutes = self.utc_offsets = None
+        self.mm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def district_ids(self):
+        return self.table["IlceID"]
+
+    def entry(self, district_id):
+        # The district's table entry, or None.
+        ids = self.table["IlceID"]
+        index = int(np.searchsorted(ids, int(district_id)))
+        if index < len(ids) and ids[index] == int(district_id):
+            return self.table[index]
+        return None
+
+    def day_range(self, district_id, start=None, end=None):
+        # (first date, first row, row after the last) in the arrays for
+        # start..end inclusive, clipped to the district's data; None when the
+        # district is unknown or the range is empty.
+        entry = self.entry(district_id)
+        if entry is None:
+            return None
+        first = EPOCH + datetime.timedelta(days=int(entry["first_day"]))
+        count = int(entry["day_count"])
+        low = max(0, (start - first).days) if start else 0
+        high = min(count, (end - first).days + 1) if end else count
+        if low >= high:
+            return None
+        base = int(entry["start"])
+        return first + datetime.timedelta(days=low), base + low, base + high
+
+    def times(self, district_id, start=None, end=None):
+        # (first date, minutes[days, prayers], utc_offsets[days]) as NumPy
+        # views, or None.
+        found = self.day_range(district_id, start, end)
+        if found is None:
+            return None
+        first, low, high = found
+        return first, self.minutes[low:high], self.utc_offsets[low:high]
+
+    def times_view(self, district_id, start=None, end=None):
+        # Like times(), but the minutes as a memoryview of shape (days,
+        # prayers), for readers without NumPy. Native byte order, so only
+        # meaningful on little-endian machines.
+        found = self.day_range(district_id, start, end)
+        if found is None:
+            return None
+        first, low, high = found
+        begin = HEADER.size + self.table.nbytes + low * self.prayer_count * 2
+        view = memoryview(self.mm)[begin:begin + (high - low) * self.prayer_count * 2]
+        return first, view.cast("H", shape=[high - low, self.prayer_count])
+
+    def day(self, district_id, date):
+        # {prayer: minutes} and the UTC offset for one day, or None.
+        found = self.times(district_id, date, date)
+        if found is None:
+            return None
+        _, minutes, offsets = found
+        return dict(zip(timetable.PRAYER_KEYS, minutes[0].tolist())), int(offsets[0])
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Single memory-mappable file with all prayer times.")
+    parser.add_argument("--file", default=DEFAULT_FILE)
+    commands = parser.add_subparsers(dest="command", required=True)
+    build_parser = commands.add_parser("build", help="pack all prayer_times files into one file")
+    build_parser.add_argument("--data-dir", default=data_dir)
+    times_parser = commands.add_parser("times", help="print a district's times from START to END (YYYY-MM-DD)")
+    times_parser.add_argument("district_id")
+    times_parser.add_argument("start")
+    times_parser.add_argument("end", nargs="?")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        if not build(args.file, args.data_dir):
+            sys.exit(1)
+    else:
+        start = datetime.date.fromisoformat(args.start)
+        end = datetime.date.fromisoformat(args.end) if args.end else start
+        dataset = MappedDataset(args.file)
+        found = dataset.times(args.district_id, start, end)
+        if found is None:
+            print(f"No times for district {args.district_id} from {start} to {end}")
+            sys.exit(1)
+        first, minutes, offsets = found
+        for index, (row, offset) in enumerate(zip(minutes.tolist(), offsets.tolist())):
+            day = first + datetime.timedelta(days=index)
+            times = "  ".join(f"{key} {timetable.format_minutes(value)}"
+                              for key, value in zip(timetable.PRAYER_KEYS, row))
+            sign = "-" if offset < 0 else "+"
+            print(f"{day}  UTC{sign}{abs(offset) // 60:02d}:{abs(offset) % 60:02d}  {times}")
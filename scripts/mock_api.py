@@ -0,0 +1,138 @@
+import argparse
+import hashlib
+import http.server
+import json
+import os
+import random
+import re
+import threading
+import time
+
+# Replays a recorded data/ snapshot as if it were the ezanvakti API, so the
+# fetch scripts can be tested and benchmarked offline:
+#
+#   python scripts/mock_api.py --port 8765 --latency-ms 40 --error-rate 0.01
+#   EZANVAKTI_BASE_URL=http://127.0.0.1:8765 python scripts/fetch_prayer_data.py
+#
+# Endpoints without a recorded file answer 404. GET /__stats returns request
+# counters as JSON.
+
+script_dir = os.path.dirname(os.path.realpath(__file__))
+repo_root = os.path.abspath(os.path.join(script_dir, ".."))
+data_dir = os.path.join(repo_root, "data")
+
+ROUTES = [
+    (re.compile(r"^/ulkeler$"), "countries.json"),
+    (re.compile(r"^/sehirler/(\d+)$"), "cities_{}.json"),
+    (re.compile(r"^/ilceler/(\d+)$"), "districts_{}.json"),
+    (re.compile(r"^/ilce-detay/(\d+)$"), "district_detail_{}.json"),
+    (re.compile(r"^/vakitler/(\d+)$"), "prayer_times_{}.json"),
+    (re.compile(r"^/bayram-namazi/(\d+)$"), "bayram_{}.json"),
+]
+
+class MockSettings:
+    def __init__(self, snapshot_dir=data_dir, latency_ms=0, jitter_ms=0, error_rate=0.0, rate_limit=0.0):
+        self.snapshot_dir = snapshot_dir
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        # Requests per second above which the mock answers 429 + Retry-After.
+        self.rate_limit = rate_limit
+        self.lock = threading.Lock()
+        self.window_start = time.monotonic()
+        self.window_count = 0
+        self.stats = {"requests": 0, "bytes_out": 0, "status": {}}
+
+    def throttled(self):
+        if not self.rate_limit:
+            return False
+        with self.lock:
+            now = time.monotonic()
+            if now - self.window_start >= 1.0:
+                self.window_start, self.window_count = now, 0
+            self.window_count += 1
+            return self.window_count > self.rate_limit
+
+    def count(self, status, size):
+        with self.lock:
+            self.stats["requests"] += 1
+            self.stats["bytes_out"] += size
+            self.stats["status"][str(status)] = self.stats["status"].get(str(status), 0) + 1
+
+class MockHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    settings = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def reply(self, status, body=b"", headers=None):
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        if self.path != "/__stats":
+            self.settings.count(status, len(body))
+
+    def do_GET(self):
+        settings = self.settings
+        if self.path == "/__stats":
+            with settings.lock:
+                body = json.dumps(settings.stats).encode("utf-8")
+            self.reply(200, body, {"Content-Type": "application/json"})
+            return
+
+        delay = settings.latency_ms + random.uniform(0, settings.jitter_ms)
+        if delay:
+            time.sleep(delay / 1000)
+        if settings.throttled():
+            self.reply(429, headers={"Retry-After": "1"})
+            return
+        if settings.error_rate and random.random() < settings.error_rate:
+            self.reply(503)
+            return
+
+        for pattern, template in ROUTES:
+            match = pattern.match(self.path)
+            if not match:
+                continue
+            filename = os.path.join(settings.snapshot_dir, template.format(*match.groups()))
+            if not os.path.exists(filename):
+                break
+            with open(filename, "rb") as f:
+                body = f.read()
+            etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+            if self.headers.get("If-None-Match") == etag:
+                self.reply(304, headers={"ETag": etag})
+            else:
+                self.reply(200, body, {"Content-Type": "application/json; charset=utf-8", "ETag": etag})
+            return
+        self.reply(404)
+
+def start(settings, host="127.0.0.1", port=0):
+    # Starts the mock on a background thread; returns (server, base URL).
+    handler = type("BoundMockHandler", (MockHandler,), {"settings": settings})
+    server = http.server.ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve a recorded data/ snapshot as a stand-in for the ezanvakti API.")
+    parser.add_argument("--snapshot-dir", default=data_dir)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0, help="added to every response")
+    parser.add_argument("--jitter-ms", type=float, default=0, help="random extra latency, up to this much")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="requests per second before answering 429")
+    args = parser.parse_args()
+    server, base_url = start(MockSettings(args.snapshot_dir, args.latency_ms, args.jitter_ms, args.error_rate,
+                                          args.rate_limit), args.host, args.port)
+    print(f"Mock ezanvakti API on {base_url} serving {args.snapshot_dir}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,183 @@
+import argparse
+import bisect
+import collections
+import heapq
+import os
+import sys
+import unicodedata
+
+import data_io
+
+# Name search over every district, by its own, its city's and its country's
+# names (Turkish and English spellings), with Turkish-aware folding so
+# "istanbul", "İSTANBUL" and "Istanbul" are the same word and "agri" finds
+# AĞRI:
+#
+#   python scripts/name_search.py build
+#   python scripts/name_search.py query "istanbul sile"
+#
+# data/search_index.json holds the districts as [IlceID, path], the sorted
+# folded terms and, per term, postings of document * 4 + field (0 district,
+# 1 city, 2 country). A query word matches terms exactly, by prefix (binary
+# search over the sorted terms) or, when neither finds anything, by trigram
+# similarity; every word has to match, and hits are ranked by how well and
+# in which field they matched. Like the other derived stores it isn't
+# committed: CI builds it and publishes it on GitHub Pages.
+
+script_dir = os.path.dirname(os.path.realpath(__file__))
+repo_root = os.path.abspath(os.path.join(script_dir, ".."))
+data_dir = os.path.join(repo_root, "data")
+DEFAULT_FILE = os.path.join(data_dir, "search_index.json")
+
+VERSION = 1
+FIELD_WEIGHTS = (1.0, 0.8, 0.5)
+EXACT, PREFIX, FUZZY = 1.0, 0.9, 0.7
+MIN_SIMILARITY = 0.5
+DEFAULT_LIMIT = 10
+
+# Python's lower() turns "İ" into "i" + a combining dot and "I" into "i";
+# Turkish has dotted and dotless i in both cases, and we want all four to
+# match the plain ASCII spelling.
+TURKISH_FOLD = str.maketrans({
+    "İ": "i", "I": "i", "ı": "i", "Ğ": "g", "ğ": "g", "Ş": "s", "ş": "s",
+    "Ç": "c", "ç": "c", "Ö": "o", "ö": "o", "Ü": "u", "ü": "u",
+})
+
+def fold(text):
+    # "AFYONKARAHİSAR" -> "afyonkarahisar", "Ağrı-Merkez" -> "agri merkez"
+    text = unicodedata.normalize("NFKD", (text or "").translate(TURKISH_FOLD).lower())
+    return "".join(c if c.isalnum() else " " for c in text if not unicodedata.combining(c))
+
+def words(*names):
+    return {word for name in names for word in fold(name).split()}
+
+def trigrams(term):
+    padded = f"${term}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def iter_districts(source_dir):
+    # (IlceID, path, {field index: words}) for every district in the tree.
+    for country in data_io.Country.from_list(data_io.load_json(os.path.join(source_dir, "countries.json"))):
+        cities_file = os.path.join(source_dir, f"cities_{country.UlkeID}.json")
+        if not os.path.exists(cities_file):
+            continue
+        country_words = words(country.UlkeAdi, country.UlkeAdiEn)
+        for city in data_io.City.from_list(data_io.load_json(cities_file)):
+            districts_file = os.path.join(source_dir, f"districts_{city.SehirID}.json")
+            if not os.path.exists(districts_file):
+                continue
+            city_words = words(city.SehirAdi, city.SehirAdiEn)
+            for district in data_io.District.from_list(data_io.load_json(districts_file)):
+                if not district.IlceID:
+                    continue
+                path = " / ".join(name for name in (country.UlkeAdi, city.SehirAdi, district.IlceAdi) if name)
+                yield district.IlceID, path, {
+                    0: words(district.IlceAdi, district.IlceAdiEn),
+                    1: city_words,
+                    2: country_words,
+                }
+
+def build(path=DEFAULT_FILE, source_dir=data_dir):
+    docs = []
+    postings = collections.defaultdict(list)
+    for district_id, district_path, fields in iter_districts(source_dir):
+        doc = len(docs)
+        docs.append([district_id, district_path])
+        for field, field_words in fields.items():
+            for word in field_words:
+                postings[word].append(doc * 4 + field)
+
+    terms = sorted(postings)
+    index = {"version": VERSION, "docs": docs, "terms": terms, "postings": [postings[term] for term in terms]}
+    payload = data_io.dumps(index, compact=True)
+    if not data_io.write_if_changed(path, payload):
+        print(f"Unchanged: {path}")
+        return
+    print(f"Wrote {path}: {len(docs)} districts, {len(terms)} terms, {len(payload)} bytes")
+
+class SearchIndex:
+    __slots__ = ("docs", "terms", "postings", "trigram_terms")
+
+    def __init__(self, index):
+        if index.get("version") != VERSION:
+            raise ValueError(f"not a version {VERSION} search index")
+        self.docs = [tuple(doc) for doc in index["docs"]]
+        self.terms = index["terms"]
+        self.postings = index["postings"]
+        # Built on load rather than shipped; it's a few thousand terms.
+        self.trigram_terms = collections.defaultdict(list)
+        for term_id, term in enumerate(self.terms):
+            for gram in trigrams(term):
+                self.trigram_terms[gram].append(term_id)
+
+    def match_terms(self, word):
+        # {term id: score} for one folded query word.
+        matches = {}
+        low = bisect.bisect_left(self.terms, word)
+        high = bisect.bisect_left(self.terms, word + "\uffff")
+        for term_id in range(low, high):
+            matches[term_id] = EXACT if self.terms[term_id] == word else PREFIX
+        if matches or len(word) < 3:
+            return matches
+        grams = trigrams(word)
+        shared = collections.Counter(term_id for gram in grams for term_id in self.trigram_terms.get(gram, ()))
+        for term_id, count in shared.items():
+            # Dice coefficient; "$term$" has len(term) trigrams.
+            similarity = 2 * count / (len(grams) + len(self.terms[term_id]))
+            if similarity >= MIN_SIMILARITY:
+                matches[term_id] = FUZZY * similarity
+        return matches
+
+    def search(self, query, limit=DEFAULT_LIMIT):
+        # Ranked [(IlceID, path)]; every word of the query has to match.
+        scores = None
+        for word in fold(query).split():
+            word_scores = {}
+            for term_id, term_score in self.match_terms(word).items():
+                for posting in self.postings[term_id]:
+                    doc, field = divmod(posting, 4)
+                    score = term_score * FIELD_WEIGHTS[field]
+                    if score > word_scores.get(doc, 0.0):
+                        word_scores[doc] = score
+            if scores is None:
+                scores = word_scores
+            else:
+                scores = {doc: score + word_scores[doc] for doc, score in scores.items() if doc in word_scores}
+            if not scores:
+                return []
+        if not scores:
+            return []
+        ranked = heapq.nsmallest(limit, scores.items(),
+                                 key=lambda item: (-item[1], len(self.docs[item[0]][1]), item[0]))
+        return [self.docs[doc] for doc, _ in ranked]
+
+@data_io.cached_file(maxsize=2)
+def parse_index(filename):
+    return SearchIndex(data_io.load_json(filename))
+
+def load_index(path=DEFAULT_FILE):
+    return parse_index(path)
+
+def search(query, limit=DEFAULT_LIMIT, path=DEFAULT_FILE):
+    return load_index(path).search(query, limit)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Search districts by district, city or country name.")
+    parser.add_argument("--file", default=DEFAULT_FILE)
+    commands = parser.add_subparsers(dest="command", required=True)
+    build_parser = commands.add_parser("build", help="build the search index from the data folder")
+    build_parser.add_argument("--data-dir", default=data_dir)
+    query_parser = commands.add_parser("query", help="print the best matches for a query")
+    query_parser.add_argument("query")
+    query_parser.add_argument("-n", "--limit", type=int, default=DEFAULT_LIMIT)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        build(args.file, args.data_dir)
+    else:
+        hits = search(args.query, args.limit, args.file)
+        if not hits:
+            print(f"No districts match {args.query!r}")
+            sys.exit(1)
+        for district_id, district_path in hits:
+            print(f"{district_id}\t{district_path}")
@@ -0,0 +1,91 @@
+import datetime
+import hashlib
+import os
+import threading
+
+import data_io
+import pipeline_metrics
+
+# Endpoints that answered with nothing useful, so the crawl stops asking
+# every run:
+#   endpoint -> {"status", "reason", "checked_at", "expires_at"}
+# with reason "empty" (200 with an empty body / list), "invalid" (not a JSON
+# object or array) or "http_<status>" for 4xx answers. Transient failures
+# (network errors, 5xx, exhausted retries) are never cached.
+#
+# The file lives in data/ next to refresh_state.json so it is committed and
+# carries over between CI runs. Expiry is spread by up to a quarter of the
+# TTL per endpoint, so thousands of entries recorded in one run don't all come
+# due in the same later run.
+
+CACHE_FILENAME = "negative_cache.json"
+TTL_DAYS = 14
+TTL_SPREAD = 0.25
+
+def utc_now():
+    return datetime.datetime.now(datetime.timezone.utc)
+
+def spread(endpoint):
+    # Stable fraction in [0, 1) per endpoint.
+    return int(hashlib.sha256(endpoint.encode("utf-8")).hexdigest()[:8], 16) / 2 ** 32
+
+def classify(data):
+    # The reason to cache a successful response, or None if it is useful.
+    if not isinstance(data, (dict, list)):
+        return "invalid"
+    if not data:
+        return "empty"
+    return None
+
+class NegativeCache:
+    def __init__(self, path, ttl_days=TTL_DAYS):
+        self.path = path
+        self.ttl = datetime.timedelta(days=ttl_days)
+        self.lock = threading.Lock()
+        self.entries = {}
+        if os.path.exists(path):
+            self.entries = data_io.load_json(path)
+
+    def lookup(self, endpoint, now=None):
+        # The live entry for the endpoint, or None if it isn't cached or has
+        # expired.
+        now = now or utc_now()
+        with self.lock:
+            entry = self.entries.get(endpoint)
+        if entry is None or datetime.datetime.fromisoformat(entry["expires_at"]) <= now:
+            return None
+        return dict(entry)
+
+    def record(self, endpoint, status, reason, now=None):
+        if self.ttl <= datetime.timedelta(0):
+            return
+        now = now or utc_now()
+        expires_at = now + self.ttl * (1 + TTL_SPREAD * spread(endpoint))
+        with self.lock:
+            self.entries[endpoint] = {
+                "status": status,
+                "reason": reason,
+                "checked_at": now.isoformat(timespec="seconds"),
+                "expires_at": expires_at.isoformat(timespec="seconds"),
+            }
+        pipeline_metrics.inc("negative_cache_recorded_total", reason=reason)
+
+    def discard(self, endpoint):
+        with self.lock:
+            self.entries.pop(endpoint, None)
+
+    def prune(self, now=None):
+        # Drops expired entries; returns how many.
+        now = now or utc_now()
+        with self.lock:
+            expired = [endpoint for endpoint, entry in self.entries.items()
+                       if datetime.datetime.fromisoformat(entry["expires_at"]) <= now]
+            for endpoint in expired:
+                del self.entries[endpoint]
+        return len(expired)
+
+    def save(self):
+        with self.lock:
+            payload = data_io.dumps(self.entries, sort_keys=True)
+        data_io.atomic_write(self.path, payload)
+        pipeline_metrics.log(f"Saved negative cache to {self.path} ({len(self.entries)} entries)")
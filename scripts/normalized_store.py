@@ -0,0 +1,177 @@
+import argparse
+import collections
+import datetime
+import os
+import re
+import sys
+
+import data_io
+import timetable
+
+# Normalized copy of the prayer times. The fields that are the same for every
+# district on a given day (Hijri date, moon phase image, long date strings)
+# are stored once per generation in dates.json; the district files only keep
+# the day, the UTC offset and the times.
+#
+#   data/normalized/dates.json
+#     {"row_fields": [...], "dates": {"23.11.2025": {"HicriTarihKisa": ..., ...}}}
+#   data/normalized/prayer_times_{IlceID}.json
+#     [["23.11.2025", "+03:00", "17:47", "07:54", ...], ...]
+#
+# A row whose shared fields disagree with dates.json carries them in a
+# trailing object, so export writes the original files back byte for byte.
+#
+#   python scripts/normalized_store.py build
+#   python scripts/normalized_store.py export OUT_DIR
+#   python scripts/normalized_store.py times 9541 2025-11-23
+
+script_dir = os.path.dirname(os.path.realpath(__file__))
+repo_root = os.path.abspath(os.path.join(script_dir, ".."))
+data_dir = os.path.join(repo_root, "data")
+normalized_dir = os.path.join(data_dir, "normalized")
+
+DATES_FILE = "dates.json"
+SHARED_FIELDS = [
+    "HicriTarihKisa", "HicriTarihKisaIso8601", "HicriTarihUzun", "HicriTarihUzunIso8601",
+    "AyinSekliURL", "MiladiTarihKisaIso8601", "MiladiTarihUzun", "GreenwichOrtalamaZamani",
+]
+# MiladiTarihUzunIso8601 is rebuilt from the date and the offset.
+ISO_KEY = "MiladiTarihUzunIso8601"
+TIME_FIELDS = [field for field in timetable.ROW_FIELDS
+               if field not in SHARED_FIELDS and field not in (timetable.DATE_KEY, ISO_KEY)]
+ROW_LAYOUT = [timetable.DATE_KEY, "offset"] + TIME_FIELDS
+
+ISO_OFFSET = re.compile(r"^(\d{4}-\d{2}-\d{2})T00:00:00\.0000000([+-]\d{2}:\d{2})$")
+
+def list_districts(source_dir):
+    return sorted(data_io.iter_prayer_files(source_dir), key=lambda item: int(item[0]))
+
+def iso_date(date_key):
+    return timetable.parse_date(date_key).isoformat()
+
+def shared_values(row):
+    return tuple(row.get(field) for field in SHARED_FIELDS)
+
+def encode_row(row, shared):
+    # `shared` is the dates.json entry for the row's day.
+    date_key = row[timetable.DATE_KEY]
+    overrides = {field: row.get(field) for field in SHARED_FIELDS if row.get(field) != shared.get(field)}
+    match = ISO_OFFSET.match(row.get(ISO_KEY) or "")
+    offset = match.group(2) if match and match.group(1) == iso_date(date_key) else None
+    if offset is None:
+        overrides[ISO_KEY] = row.get(ISO_KEY)
+    encoded = [date_key, offset] + [row.get(field) for field in TIME_FIELDS]
+    if overrides:
+        encoded.append(overrides)
+    return encoded
+
+def decode_row(encoded, dates, intern=sys.intern):
+    date_key = intern(encoded[0])
+    values = dict(dates.get(date_key) or {})
+    values[timetable.DATE_KEY] = date_key
+    offset = encoded[1]
+    if offset is not None:
+        values[ISO_KEY] = intern(f"{iso_date(date_key)}T00:00:00.0000000{offset}")
+    for field, value in zip(TIME_FIELDS, encoded[2:]):
+        values[field] = intern(value) if isinstance(value, str) else value
+    if len(encoded) > len(ROW_LAYOUT):
+        values.update(encoded[len(ROW_LAYOUT)])
+    return {field: values.get(field) for field in timetable.ROW_FIELDS}
+
+def build(source_dir=data_dir, out_dir=normalized_dir):
+    os.makedirs(out_dir, exist_ok=True)
+    districts = [(district_id, data_io.load_json(filename)) for district_id, filename in list_districts(source_dir)]
+
+    # The shared entry for a day is what most districts have.
+    votes = collections.defaultdict(collections.Counter)
+    for _, rows in districts:
+        for row in rows:
+            votes[row[timetable.DATE_KEY]][shared_values(row)] += 1
+    dates = {}
+    for date_key in sorted(votes, key=timetable.parse_date):
+        dates[date_key] = dict(zip(SHARED_FIELDS, votes[date_key].most_common(1)[0][0]))
+
+    written = skipped = overridden = 0
+    table = {"row_fields": ROW_LAYOUT, "dates": dates}
+    if data_io.write_if_changed(os.path.join(out_dir, DATES_FILE), data_io.dumps(table, compact=True)):
+        written += 1
+    else:
+        skipped += 1
+    for district_id, rows in districts:
+        encoded = [encode_row(row, dates[row[timetable.DATE_KEY]]) for row in rows]
+        overridden += sum(len(row) > len(ROW_LAYOUT) for row in encoded)
+        payload = data_io.dumps(encoded, compact=True)
+        if data_io.write_if_changed(os.path.join(out_dir, f"prayer_times_{district_id}.json"), payload):
+            written += 1
+        else:
+            skipped += 1
+
+    # Districts that dropped out of data/.
+    current = {district_id for district_id, _ in districts}
+    removed = 0
+    for district_id, filename in list_districts(out_dir):
+        if district_id not in current:
+            os.remove(filename)
+            removed += 1
+
+    print(f"Normalized {len(districts)} districts over {len(dates)} days: {written} written, "
+          f"{skipped} unchanged, {removed} removed, {overridden} rows with overrides")
+
+@data_io.cached_file(maxsize=4)
+def parse_dates(filename):
+    # Every string is interned, so all districts share one copy of each day's
+    # values.
+    table = data_io.load_json(filename)
+    return {sys.intern(date_key): {field: sys.intern(value) if isinstance(value, str) else value
+                                   for field, value in shared.items()}
+            for date_key, shared in table["dates"].items()}
+
+def load_dates(source_dir=normalized_dir):
+    filename = os.path.join(source_dir, DATES_FILE)
+    return parse_dates(filename)
+
+def load_rows(district_id, source_dir=normalized_dir):
+    # The district's rows in the same shape as prayer_times_{IlceID}.json, or
+    # None when there is no file for it.
+    filename = os.path.join(source_dir, f"prayer_times_{district_id}.json")
+    if not os.path.exists(filename):
+        return None
+    dates = load_dates(source_dir)
+    return [decode_row(encoded, dates) for encoded in data_io.load_json(filename)]
+
+def export(out_dir, source_dir=normalized_dir):
+    # Writes prayer_times_* back out in the layout and formatting of the
+    # fetch scripts.
+    os.makedirs(out_dir, exist_ok=True)
+    written = 0
+    for district_id, _ in list_districts(source_dir):
+        rows = load_rows(district_id, source_dir)
+        data_io.save_json(os.path.join(out_dir, f"prayer_times_{district_id}.json"), rows)
+        written += 1
+    print(f"Exported {written} files to {out_dir}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Normalized prayer times: shared per-day fields stored once.")
+    parser.add_argument("--dir", default=normalized_dir, help="normalized data folder")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build_parser = commands.add_parser("build", help="normalize the prayer_times files")
+    build_parser.add_argument("--data-dir", default=data_dir)
+    export_parser = commands.add_parser("export", help="write the original prayer_times files back out")
+    export_parser.add_argument("out_dir")
+    times_parser = commands.add_parser("times", help="print the times of a district on a date (YYYY-MM-DD)")
+    times_parser.add_argument("district_id")
+    times_parser.add_argument("date")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        build(args.data_dir, args.dir)
+    elif args.command == "export":
+        export(args.out_dir, args.dir)
+    else:
+        date = datetime.date.fromisoformat(args.date)
+        rows = load_rows(args.district_id, args.dir) or []
+        row = next((row for row in rows if timetable.row_date(row) == date), None)
+        if row is None:
+            print(f"No times for district {args.district_id} on {args.date}")
+            sys.exit(1)
+        print(data_io.dumps(row).decode("utf-8"))
@@ -0,0 +1,126 @@
+import argparse
+import datetime
+import heapq
+import itertools
+import os
+import re
+import sys
+
+import data_io
+import precompute_instants
+import timetable
+
+# Every prayer of every district inside a time window, as one stream sorted
+# by UTC instant, so a notification dispatcher can read it front to back
+# instead of scanning 5,200 timetables every minute:
+#
+#   python scripts/notification_schedule.py --start 2025-11-23T00:00:00Z --hours 24
+#
+# writes data/.cache/schedule/events_0000.ndjson, events_0001.ndjson, ... with
+# one event per line,
+#
+#   {"t": 1763868240, "IlceID": "9541", "prayer": "Imsak"}
+#
+# and index.json listing the chunks with their first and last instant.
+# Events at the same instant are ordered by IlceID, then prayer order.
+#
+# Each district's events come from prayer_instants_{IlceID}.json when it is
+# up to date, otherwise from the prayer_times file; the per-district sorted
+# lists are combined with a k-way heap merge.
+
+script_dir = os.path.dirname(os.path.realpath(__file__))
+repo_root = os.path.abspath(os.path.join(script_dir, ".."))
+data_dir = os.path.join(repo_root, "data")
+DEFAULT_OUT_DIR = os.path.join(data_dir, ".cache", "schedule")
+
+DEFAULT_HOURS = 24
+CHUNK_SIZE = 100000
+INDEX_FILENAME = "index.json"
+CHUNK_PATTERN = re.compile(r"^events_\d+\.ndjson$")
+
+def parse_instant(value):
+    # ISO 8601 to epoch seconds; naive values are taken as UTC.
+    when = datetime.datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=datetime.timezone.utc)
+    return int(when.timestamp())
+
+def load_instants(prayer_times_file):
+    # (prayers, [[instant, ...] per day]) for one district.
+    instants_file = precompute_instants.instants_file(prayer_times_file)
+    if os.path.exists(instants_file) and os.path.getmtime(instants_file) >= os.path.getmtime(prayer_times_file):
+        resolved = precompute_instants.load_instants(instants_file)
+        return resolved["prayers"], resolved["instants"]
+    rows = data_io.load_json(prayer_times_file)
+    return timetable.PRAYER_KEYS, [timetable.utc_instants(row) for row in rows]
+
+def district_events(district_id, prayer_times_file, start, end):
+    # Sorted (instant, IlceID, prayer index, prayer) tuples in [start, end).
+    prayers, days = load_instants(prayer_times_file)
+    order = {prayer: index for index, prayer in enumerate(timetable.PRAYER_KEYS)}
+    events = [(instant, district_id, order.get(prayer, len(order)), prayer)
+              for day in days for prayer, instant in zip(prayers, day) if start <= instant < end]
+    events.sort()
+    return events
+
+def iter_schedule(source_dir, start, end):
+    # One sorted list per district, merged lazily.
+    streams = []
+    for district_id, filename in data_io.iter_prayer_files(source_dir):
+        try:
+            events = district_events(int(district_id), filename, start, end)
+        except (ValueError, KeyError, TypeError) as e:
+            print(f"Skipping {filename}: {e}", file=sys.stderr)
+            continue
+        if events:
+            streams.append(events)
+    return heapq.merge(*streams)
+
+def encode_event(event):
+    instant, district_id, _, prayer = event
+    return data_io.dumps({"t": instant, "IlceID": str(district_id), "prayer": prayer}, compact=True) + b"\n"
+
+def write_chunks(events, out_dir, start, end, chunk_size=CHUNK_SIZE):
+    os.makedirs(out_dir, exist_ok=True)
+    for name in os.listdir(out_dir):
+        if CHUNK_PATTERN.match(name):
+            os.remove(os.path.join(out_dir, name))
+
+    chunks = []
+    total = 0
+    for number in itertools.count():
+        batch = list(itertools.islice(events, chunk_size))
+        if not batch:
+            break
+        name = f"events_{number:04d}.ndjson"
+        data_io.atomic_write(os.path.join(out_dir, name), b"".join(map(encode_event, batch)))
+        chunks.append({"file": name, "first": batch[0][0], "last": batch[-1][0], "events": len(batch)})
+        total += len(batch)
+
+    index = {"start": start, "end": end, "events": total, "chunks": chunks}
+    data_io.save_json(os.path.join(out_dir, INDEX_FILENAME), index)
+    return index
+
+def main(start=None, hours=DEFAULT_HOURS, source_dir=data_dir, out_dir=DEFAULT_OUT_DIR, chunk_size=CHUNK_SIZE,
+         stdout=False):
+    start = start if start is not None else int(datetime.datetime.now(datetime.timezone.utc).timestamp())
+    end = start + int(hours * 3600)
+    events = iter_schedule(source_dir, start, end)
+    if stdout:
+        for event in events:
+            sys.stdout.buffer.write(encode_event(event))
+        return
+    index = write_chunks(events, out_dir, start, end, chunk_size)
+    print(f"Scheduled {index['events']} events from {start} to {end} in {len(index['chunks'])} chunks in {out_dir}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write a time-sorted stream of prayer events for all districts.")
+    parser.add_argument("--start", default=None, help="window start, ISO 8601 (default: now, UTC)")
+    parser.add_argument("--hours", type=float, default=DEFAULT_HOURS, help="window length")
+    parser.add_argument("--data-dir", default=data_dir)
+    parser.add_argument("--out-dir", default=DEFAULT_OUT_DIR)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="events per NDJSON file")
+    parser.add_argument("--stdout", action="store_true", help="write NDJSON to stdout instead of chunk files")
+    args = parser.parse_args()
+    main(parse_instant(args.start) if args.start else None, args.hours, args.data_dir, args.out_dir,
+         args.chunk_size, args.stdout)
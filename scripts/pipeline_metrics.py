@@ -0,0 +1,136 @@
+import contextlib
+import json
+import os
+import threading
+import time
+
+# Process-wide metrics for the fetch / combine / manifest steps: counters,
+# gauges and latency histograms with labels, exported as JSON lines or in the
+# Prometheus text format. log() replaces print() for progress output so it
+# can be silenced with quiet mode.
+
+LATENCY_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0]
+FORMATS = ("jsonl", "prometheus")
+
+lock = threading.Lock()
+counters = {}
+gauges = {}
+histograms = {}
+quiet = False
+
+def set_quiet(value):
+    global quiet
+    quiet = value
+
+def log(message):
+    if not quiet:
+        print(message)
+
+def series_key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+def inc(name, value=1, **labels):
+    key = series_key(name, labels)
+    with lock:
+        counters[key] = counters.get(key, 0) + value
+
+def set_gauge(name, value, **labels):
+    with lock:
+        gauges[series_key(name, labels)] = value
+
+def observe(name, value, buckets=LATENCY_BUCKETS, **labels):
+    key = series_key(name, labels)
+    with lock:
+        histogram = histograms.get(key)
+        if histogram is None:
+            histogram = histograms[key] = {"buckets": list(buckets), "counts": [0] * len(buckets), "sum": 0.0, "count": 0}
+        for index, bound in enumerate(histogram["buckets"]):
+            if value <= bound:
+                histogram["counts"][index] += 1
+                break
+        histogram["sum"] += value
+        histogram["count"] += 1
+
+@contextlib.contextmanager
+def stage(name):
+    # Times a pipeline stage into stage_duration_seconds{stage=name}.
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        set_gauge("stage_duration_seconds", round(time.perf_counter() - started, 6), stage=name)
+
+def file_kind(filename):
+    # "prayer_times_9541.json" -> "prayer_times"
+    base = filename.replace("\\", "/").rsplit("/", 1)[-1]
+    return base.rsplit(".", 1)[0].rstrip("0123456789").rstrip("_") or base
+
+def reset():
+    with lock:
+        counters.clear()
+        gauges.clear()
+        histograms.clear()
+
+def export_jsonl():
+    lines = []
+    with lock:
+        for (name, labels), value in sorted(counters.items()):
+            lines.append({"name": name, "type": "counter", "labels": dict(labels), "value": value})
+        for (name, labels), value in sorted(gauges.items()):
+            lines.append({"name": name, "type": "gauge", "labels": dict(labels), "value": value})
+        for (name, labels), histogram in sorted(histograms.items()):
+            lines.append({"name": name, "type": "histogram", "labels": dict(labels),
+                          "buckets": dict(zip(map(str, histogram["buckets"]), histogram["counts"])),
+                          "sum": round(histogram["sum"], 6), "count": histogram["count"]})
+    return "".join(json.dumps(line, ensure_ascii=False) + "\n" for line in lines)
+
+def format_labels(labels, extra=None):
+    pairs = list(labels) + list((extra or {}).items())
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"') for _, value in pairs)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + "}"
+
+def export_prometheus():
+    lines = []
+    with lock:
+        for kind, series in (("counter", counters), ("gauge", gauges)):
+            typed = set()
+            for (name, labels), value in sorted(series.items()):
+                if name not in typed:
+                    lines.append(f"# TYPE {name} {kind}")
+                    typed.add(name)
+                lines.append(f"{name}{format_labels(labels)} {value}")
+        typed = set()
+        for (name, labels), histogram in sorted(histograms.items()):
+            if name not in typed:
+                lines.append(f"# TYPE {name} histogram")
+                typed.add(name)
+            cumulative = 0
+            for bound, count in zip(histogram["buckets"], histogram["counts"]):
+                cumulative += count
+                lines.append(f"{name}_bucket{format_labels(labels, {'le': bound})} {cumulative}")
+            lines.append(f"{name}_bucket{format_labels(labels, {'le': '+Inf'})} {histogram['count']}")
+            lines.append(f"{name}_sum{format_labels(labels)} {round(histogram['sum'], 6)}")
+            lines.append(f"{name}_count{format_labels(labels)} {histogram['count']}")
+    return "\n".join(lines) + "\n"
+
+def write(path, fmt="jsonl"):
+    payload = export_prometheus() if fmt == "prometheus" else export_jsonl()
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(payload)
+
+def add_arguments(parser):
+    # The same --quiet / --metrics-out / --metrics-format flags on every step.
+    parser.add_argument("--quiet", action="store_true", help="only print warnings and the final summary")
+    parser.add_argument("--metrics-out", default=None, help="write metrics to this file when done")
+    parser.add_argument("--metrics-format", choices=FORMATS, default="jsonl")
+
+def apply_arguments(args):
+    set_quiet(args.quiet)
+
+def finish(args):
+    if args.metrics_out:
+        write(args.metrics_out, args.metrics_format)
+        print(f"Metrics written to {args.metrics_out}")
@@ -0,0 +1,105 @@
+import datetime
+import os
+
+import data_io
+import timetable
+
+# Small lookup API over data/prayer_times_{IlceID}.json:
+#
+#   times_for(district_id, date)       -> the day's row, or None
+#   next_prayer(district_id, now)      -> (prayer name, datetime), or None
+#   range(district_id, start, end)     -> rows from start to end, inclusive
+#
+# Parsed timetables are kept in a bounded LRU cache with a date -> row index,
+# so repeated lookups don't re-read or re-parse anything. A cached timetable
+# is dropped as soon as its file changes on disk.
+
+script_dir = os.path.dirname(os.path.realpath(__file__))
+repo_root = os.path.abspath(os.path.join(script_dir, ".."))
+data_dir = os.path.join(repo_root, "data")
+
+CACHE_SIZE = 512
+
+class Timetable:
+    __slots__ = ("district_id", "rows", "by_date")
+
+    def __init__(self, district_id, rows):
+        self.district_id = district_id
+        self.rows = sorted(rows, key=timetable.row_date)
+        self.by_date = {timetable.row_date(row): row for row in self.rows}
+
+def prayer_times_file(district_id, source_dir=None):
+    return os.path.join(source_dir or data_dir, f"prayer_times_{district_id}.json")
+
+@data_io.cached_file(maxsize=CACHE_SIZE)
+def parse_timetable(filename):
+    district_id = data_io.PRAYER_TIMES_PATTERN.match(os.path.basename(filename)).group(1)
+    return Timetable(district_id, data_io.load_json(filename))
+
+def load_timetable(district_id, source_dir=None):
+    # Returns None when there is no prayer_times file for the district.
+    try:
+        return parse_timetable(prayer_times_file(district_id, source_dir))
+    except FileNotFoundError:
+        return None
+
+def clear_cache():
+    parse_timetable.cache_clear()
+
+def times_for(district_id, date, source_dir=None):
+    if isinstance(date, datetime.datetime):
+        date = date.date()
+    table = load_timetable(district_id, source_dir)
+    return table.by_date.get(date) if table else None
+
+def range(district_id, start, end, source_dir=None):
+    # Days without data are left out rather than returned as None.
+    table = load_timetable(district_id, source_dir)
+    if not table:
+        return []
+    rows = []
+    day = start
+    while day <= end:
+        row = table.by_date.get(day)
+        if row is not None:
+            rows.append(row)
+        day += datetime.timedelta(days=1)
+    return rows
+
+def local_zone(row):
+    return datetime.timezone(datetime.timedelta(minutes=timetable.utc_offset_minutes(row)))
+
+def next_prayer(district_id, now=None, source_dir=None):
+    # `now` is the district's local wall-clock time when naive; an aware
+    # datetime is converted with the district's UTC offset for that day and
+    # the result is aware as well. The default is the current time in UTC,
+    # not the machine's local time, which says nothing about the district.
+    table = load_timetable(district_id, source_dir)
+    if not table:
+        return None
+    now = now or datetime.datetime.now(datetime.timezone.utc)
+    aware = now.tzinfo is not None
+    if aware:
+        row = table.by_date.get(now.astimezone(datetime.timezone.utc).date())
+        if row is not None:
+            now = now.astimezone(local_zone(row))
+
+    # Yesterday's Yatsi can fall after midnight, and the next prayer may be
+    # tomorrow's Imsak; utc_instants() puts each prayer on the right day.
+    day = now.date()
+    if not aware:
+        row = table.by_date.get(day) or table.by_date.get(day - datetime.timedelta(days=1))
+        if row is None:
+            return None
+        now = now.replace(tzinfo=local_zone(row))
+    candidates = []
+    for current in (day - datetime.timedelta(days=1), day, day + datetime.timedelta(days=1)):
+        row = table.by_date.get(current)
+        if row is not None:
+            for key, instant in zip(timetable.PRAYER_KEYS, timetable.utc_instants(row)):
+                candidates.append((instant, key, row))
+    for instant, key, row in sorted(candidates, key=lambda candidate: candidate[0]):
+        if instant > now.timestamp():
+            when = datetime.datetime.fromtimestamp(instant, local_zone(row))
+            return key, when if aware else when.replace(tzinfo=None)
+    return None
@@ -0,0 +1,101 @@
+import argparse
+import gzip
+import hashlib
+import os
+import re
+
+import data_io
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Builds gzip (and brotli, when the module is installed) variants of the
+# files clients download, plus an index with their sha256, for serve_data.py.
+# Files whose mtime and size didn't change since the last run are skipped.
+
+script_dir = os.path.dirname(os.path.realpath(__file__))
+repo_root = os.path.abspath(os.path.join(script_dir, ".."))
+data_dir = os.path.join(repo_root, "data")
+DEFAULT_OUT_DIR = os.path.join(data_dir, ".cache", "static")
+INDEX_FILENAME = "index.json"
+
+# Everything a client may request.
+SERVED_FILE = re.compile(r"^(countries|manifest|district_index|search_index|bundle_index|manifest_\d+|cities_\d+|districts_\d+|prayer_times_\d+|prayer_instants_\d+)\.json$"
+                         r"|^prayer_times_\d+\.bin$|^bundle_(country|city)_\d+\.zip$")
+
+# Tiny files are not worth compressing.
+MIN_SIZE = 256
+
+def compress(payload):
+    variants = {"gzip": gzip.compress(payload, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants["br"] = brotli.compress(payload, quality=11)
+    return variants
+
+def load_index(out_dir):
+    filename = os.path.join(out_dir, INDEX_FILENAME)
+    if not os.path.exists(filename):
+        return {}
+    return data_io.load_json(filename)
+
+def precompress_file(source_dir, out_dir, name):
+    # Returns the index entry for one file.
+    filename = os.path.join(source_dir, name)
+    st = os.stat(filename)
+    with open(filename, "rb") as f:
+        payload = f.read()
+    entry = {
+        "mtime_ns": st.st_mtime_ns,
+        "size": len(payload),
+        "sha256": hashlib.sha256(payload).hexdigest(),
+        "variants": {}
+    }
+    if len(payload) >= MIN_SIZE:
+        for encoding, compressed in compress(payload).items():
+            # Only keep variants that actually save bytes.
+            if len(compressed) >= len(payload):
+                continue
+            variant = f"{name}.{'gz' if encoding == 'gzip' else 'br'}"
+            # serve_data.py calls this while it may be sending the old
+            # variant; replace it whole so that response isn't cut short.
+            data_io.atomic_write(os.path.join(out_dir, variant), compressed)
+            entry["variants"][encoding] = {"file": variant, "size": len(compressed)}
+    return entry
+
+def main(source_dir=data_dir, out_dir=DEFAULT_OUT_DIR):
+    os.makedirs(out_dir, exist_ok=True)
+    previous = load_index(out_dir)
+    index = {}
+    built = 0
+
+    for name in sorted(os.listdir(source_dir)):
+        if not SERVED_FILE.match(name):
+            continue
+        st = os.stat(os.path.join(source_dir, name))
+        cached = previous.get(name)
+        if cached and cached["mtime_ns"] == st.st_mtime_ns and cached["size"] == st.st_size:
+            index[name] = cached
+            continue
+        index[name] = precompress_file(source_dir, out_dir, name)
+        built += 1
+
+    # Remove variants of files that are gone.
+    for name in set(previous) - set(index):
+        for variant in previous[name]["variants"].values():
+            path = os.path.join(out_dir, variant["file"])
+            if os.path.exists(path):
+                os.remove(path)
+
+    data_io.save_json(os.path.join(out_dir, INDEX_FILENAME), index, compact=True)
+    encodings = "gzip, br" if brotli is not None else "gzip"
+    print(f"Precompressed {built} files ({encodings}), {len(index) - built} unchanged")
+    return index
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build precompressed variants of the served data files.")
+    parser.add_argument("--data-dir", default=data_dir)
+    parser.add_argument("--out-dir", default=DEFAULT_OUT_DIR)
+    args = parser.parse_args()
+    main(args.data_dir, args.out_dir)
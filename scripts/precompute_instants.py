@@ -0,0 +1,68 @@
+import argparse
+import os
+import sys
+
+import data_io
+import timetable
+
+# Resolves every prayer_times_{IlceID}.json into UTC epoch seconds and writes
+# prayer_instants_{IlceID}.json next to it, so alarms and the notification
+# scheduler compare integers instead of parsing "HH:MM" and offsets:
+#
+#   {"IlceID": "9541", "prayers": ["Imsak", ..., "Yatsi"],
+#    "offset_policy": "iso8601",
+#    "dates": ["2025-11-23", ...],            local dates, ascending
+#    "utc_offsets": [180, ...],               minutes east of UTC, per date
+#    "instants": [[1763868240, ...], ...]}    per date, in "prayers" order
+#
+# The offset policy is documented on timetable.utc_instants().
+
+OFFSET_POLICY = "iso8601"
+
+def instants_file(prayer_times_file):
+    directory, name = os.path.split(prayer_times_file)
+    return os.path.join(directory, name.replace("prayer_times_", "prayer_instants_", 1))
+
+def resolve_district(district_id, rows):
+    rows = sorted(rows, key=timetable.row_date)
+    return {
+        "IlceID": str(district_id),
+        "prayers": timetable.PRAYER_KEYS,
+        "offset_policy": OFFSET_POLICY,
+        "dates": [timetable.row_date(row).isoformat() for row in rows],
+        "utc_offsets": [timetable.utc_offset_minutes(row) for row in rows],
+        "instants": [timetable.utc_instants(row) for row in rows],
+    }
+
+def load_instants(filename):
+    return data_io.load_json(filename)
+
+def export_file(district_id, filename):
+    # Returns True when the instants file was (re)written.
+    rows = data_io.load_json(filename)
+    payload = data_io.dumps(resolve_district(district_id, rows), compact=True)
+    return data_io.write_if_changed(instants_file(filename), payload)
+
+def main(data_dir):
+    written = skipped = failed = 0
+    for district_id, filename in data_io.iter_prayer_files(data_dir):
+        try:
+            if export_file(district_id, filename):
+                written += 1
+            else:
+                skipped += 1
+        except (ValueError, KeyError, TypeError) as e:
+            print(f"Could not resolve {filename}: {e}")
+            failed += 1
+    print(f"UTC instants: {written} written, {skipped} unchanged, {failed} failed")
+    return failed == 0
+
+if __name__ == "__main__":
+    script_dir = os.path.dirname(os.path.realpath(__file__))
+    repo_root = os.path.abspath(os.path.join(script_dir, ".."))
+
+    parser = argparse.ArgumentParser(description="Precompute UTC epoch seconds for every prayer of every district.")
+    parser.add_argument("--data-dir", default=os.path.join(repo_root, "data"))
+    args = parser.parse_args()
+    if not main(args.data_dir):
+        sys.exit(1)
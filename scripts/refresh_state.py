@@ -0,0 +1,85 @@
+import datetime
+import hashlib
+import os
+import threading
+
+import data_io
+import pipeline_metrics
+import timetable
+
+# Small index of what we know about every endpoint we have fetched:
+#   endpoint -> {"fetched_at", "etag", "last_modified", "sha256"}
+# It lets an incremental refresh decide what is due, revalidate with
+# If-None-Match / If-Modified-Since, and skip rewriting unchanged files.
+
+STATE_FILENAME = "refresh_state.json"
+
+# Country/city/district lists and district details barely ever change upstream.
+LIST_MAX_AGE_DAYS = 30
+# Refetch prayer times once fewer than this many days are left in the file.
+MIN_COVERAGE_DAYS = 10
+
+PRAYER_TIMES_PREFIX = "/vakitler/"
+
+def utc_now():
+    return datetime.datetime.now(datetime.timezone.utc)
+
+def content_hash(payload):
+    return hashlib.sha256(payload).hexdigest()
+
+def file_hash(filename):
+    with open(filename, "rb") as f:
+        return content_hash(f.read())
+
+class RefreshState:
+    def __init__(self, path, list_max_age_days=LIST_MAX_AGE_DAYS, min_coverage_days=MIN_COVERAGE_DAYS):
+        self.path = path
+        self.list_max_age = datetime.timedelta(days=list_max_age_days)
+        self.min_coverage_days = min_coverage_days
+        self.lock = threading.Lock()
+        self.entries = {}
+        if os.path.exists(path):
+            self.entries = data_io.load_json(path)
+
+    def get(self, endpoint):
+        with self.lock:
+            return dict(self.entries.get(endpoint) or {})
+
+    def validators(self, endpoint):
+        # Conditional request headers for a revalidation.
+        entry = self.get(endpoint)
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def record(self, endpoint, headers=None, sha256=None):
+        with self.lock:
+            entry = self.entries.setdefault(endpoint, {})
+            entry["fetched_at"] = utc_now().isoformat(timespec="seconds")
+            if headers is not None:
+                entry["etag"] = headers.get("ETag") or entry.get("etag")
+                entry["last_modified"] = headers.get("Last-Modified") or entry.get("last_modified")
+            if sha256 is not None:
+                entry["sha256"] = sha256
+
+    def is_due(self, endpoint, data, now=None):
+        # `data` is the current content of the endpoint's file.
+        now = now or utc_now()
+        if endpoint.startswith(PRAYER_TIMES_PREFIX):
+            if not isinstance(data, list):
+                return True
+            return timetable.days_left(data, now.date()) < self.min_coverage_days
+        entry = self.get(endpoint)
+        if not entry.get("fetched_at"):
+            return True
+        fetched_at = datetime.datetime.fromisoformat(entry["fetched_at"])
+        return now - fetched_at >= self.list_max_age
+
+    def save(self):
+        with self.lock:
+            payload = data_io.dumps(self.entries, sort_keys=True)
+        data_io.atomic_write(self.path, payload)
+        pipeline_metrics.log(f"Saved refresh state to {self.path}")
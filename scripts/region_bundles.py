@@ -0,0 +1,234 @@
+import argparse
+import hashlib
+import io
+import os
+import re
+import struct
+import sys
+import zipfile
+import zlib
+
+import data_io
+
+# One archive per country (and, with --per-city, per city) holding everything
+# a client needs for that region, so it makes one request instead of hundreds:
+#
+#   python scripts/region_bundles.py build [--per-city]
+#   python scripts/region_bundles.py read 9541
+#
+# data/bundle_country_{UlkeID}.zip holds cities_{UlkeID}.json,
+# manifest_{UlkeID}.json and, per city, districts_{SehirID}.json and the
+# prayer_times_{IlceID}.json of its districts; data/bundle_city_{SehirID}.zip
+# holds one city's districts and prayer times. Members are the data files
+# byte for byte. The archives are deterministic (fixed timestamps and
+# permissions, members in hierarchy order), so an unchanged region gives the
+# same bytes.
+#
+# data/bundle_index.json lists every bundle:
+#   {"version": 1, "bundles": {"bundle_country_2.zip": {
+#       "region": "country", "id": "2",
+#       "source_sha256": ...,    hash of the member names and contents
+#       "sha256": ..., "size": ...,    of the archive itself
+#       "members": {"prayer_times_9541.json": [offset, length, size, crc32, method], ...}}}}
+# where offset/length locate a member's compressed bytes in the archive and
+# method is the zip method (8 deflate, 0 stored). A client can fetch that
+# byte range and inflate it (raw deflate, no zlib header) without touching
+# the rest of the archive. A bundle whose source_sha256 didn't change, and
+# whose archive still has the recorded sha256, is not rebuilt.
+#
+# The bundles repeat the JSON files, so they aren't committed: CI builds them
+# and publishes them with the rest of data/ on GitHub Pages, which serves
+# byte ranges.
+
+script_dir = os.path.dirname(os.path.realpath(__file__))
+repo_root = os.path.abspath(os.path.join(script_dir, ".."))
+data_dir = os.path.join(repo_root, "data")
+INDEX_FILENAME = "bundle_index.json"
+
+VERSION = 1
+BUNDLE_PATTERN = re.compile(r"^bundle_(country|city)_\d+\.zip$")
+# The earliest date a zip header can hold.
+DATE_TIME = (1980, 1, 1, 0, 0, 0)
+LOCAL_HEADER = struct.Struct("<4s22xHH")
+
+def read_file(source_dir, name):
+    filename = os.path.join(source_dir, name)
+    if not os.path.exists(filename):
+        return None
+    with open(filename, "rb") as f:
+        return f.read()
+
+def city_members(source_dir, sehir_id):
+    # (name, bytes) for one city's districts list and prayer times.
+    districts_name = f"districts_{sehir_id}.json"
+    payload = read_file(source_dir, districts_name)
+    if payload is None:
+        return []
+    members = [(districts_name, payload)]
+    for district in data_io.District.from_list(data_io.loads(payload)):
+        prayer_name = f"prayer_times_{district.id}.json"
+        prayer_payload = read_file(source_dir, prayer_name)
+        if prayer_payload is not None:
+            members.append((prayer_name, prayer_payload))
+    return members
+
+def iter_regions(source_dir, per_city=False):
+    # (bundle name, region, id, members) for every country and, with
+    # per_city, every city.
+    for country in data_io.Country.from_list(data_io.load_json(os.path.join(source_dir, "countries.json"))):
+        ulke_id = country.UlkeID
+        cities_name = f"cities_{ulke_id}.json"
+        payload = read_file(source_dir, cities_name)
+        if not ulke_id or payload is None:
+            continue
+        members = [(cities_name, payload)]
+        manifest_name = f"manifest_{ulke_id}.json"
+        manifest_payload = read_file(source_dir, manifest_name)
+        if manifest_payload is not None:
+            members.append((manifest_name, manifest_payload))
+        for city in data_io.City.from_list(data_io.loads(payload)):
+            sehir_id = city.SehirID
+            if not sehir_id:
+                continue
+            current = city_members(source_dir, sehir_id)
+            members.extend(current)
+            if per_city and current:
+                yield f"bundle_city_{sehir_id}.zip", "city", str(sehir_id), current
+        yield f"bundle_country_{ulke_id}.zip", "country", str(ulke_id), members
+
+def file_sha256(filename):
+    # None when the file is missing.
+    payload = read_file(*os.path.split(filename))
+    return hashlib.sha256(payload).hexdigest() if payload is not None else None
+
+def source_hash(members):
+    digest = hashlib.sha256()
+    for name, payload in members:
+        digest.update(f"{name}\0{len(payload)}\0".encode("utf-8"))
+        digest.update(payload)
+    return digest.hexdigest()
+
+def build_archive(members):
+    # Returns the archive bytes and {name: [offset, length, size, crc32, method]}.
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name, payload in members:
+            info = zipfile.ZipInfo(name, date_time=DATE_TIME)
+            info.compress_type = zipfile.ZIP_DEFLATED
+            info.create_system = 3
+            info.external_attr = 0o644 << 16
+            archive.writestr(info, payload, compresslevel=9)
+        infos = archive.infolist()
+    payload = buffer.getvalue()
+
+    offsets = {}
+    for info in infos:
+        magic, name_length, extra_length = LOCAL_HEADER.unpack_from(payload, info.header_offset)
+        if magic != b"PK\x03\x04":
+            raise ValueError(f"no local header for {info.filename} at {info.header_offset}")
+        offset = info.header_offset + LOCAL_HEADER.size + name_length + extra_length
+        offsets[info.filename] = [offset, info.compress_size, info.file_size, info.CRC, info.compress_type]
+    return payload, offsets
+
+def load_index(source_dir=data_dir):
+    filename = os.path.join(source_dir, INDEX_FILENAME)
+    if not os.path.exists(filename):
+        return {"version": VERSION, "bundles": {}}
+    return data_io.load_json(filename)
+
+def build(source_dir=data_dir, per_city=False):
+    previous = load_index(source_dir).get("bundles", {})
+    bundles = {}
+    written = unchanged = 0
+
+    for name, region, region_id, members in iter_regions(source_dir, per_city):
+        sha256 = source_hash(members)
+        cached = previous.get(name)
+        filename = os.path.join(source_dir, name)
+        if cached and cached["source_sha256"] == sha256 and file_sha256(filename) == cached["sha256"]:
+            bundles[name] = cached
+            unchanged += 1
+            continue
+        payload, offsets = build_archive(members)
+        if data_io.write_if_changed(filename, payload):
+            written += 1
+        else:
+            unchanged += 1
+        bundles[name] = {
+            "region": region,
+            "id": region_id,
+            "source_sha256": sha256,
+            "sha256": hashlib.sha256(payload).hexdigest(),
+            "size": len(payload),
+            "members": offsets,
+        }
+
+    # Regions that are gone, or city bundles from a --per-city run.
+    removed = 0
+    for name in os.listdir(source_dir):
+        if BUNDLE_PATTERN.match(name) and name not in bundles:
+            os.remove(os.path.join(source_dir, name))
+            removed += 1
+
+    data_io.write_if_changed(os.path.join(source_dir, INDEX_FILENAME),
+                             data_io.dumps({"version": VERSION, "bundles": bundles}, compact=True))
+    print(f"Bundles: {written} written, {unchanged} unchanged, {removed} removed")
+    return bundles
+
+def read_member(filename, entry):
+    # Bytes of one member, reading only its own range of the archive.
+    offset, length, size, crc, method = entry
+    with open(filename, "rb") as f:
+        f.seek(offset)
+        compressed = f.read(length)
+    if method == zipfile.ZIP_DEFLATED:
+        payload = zlib.decompress(compressed, -zlib.MAX_WBITS)
+    elif method == zipfile.ZIP_STORED:
+        payload = compressed
+    else:
+        raise ValueError(f"unsupported compression method {method} in {filename}")
+    if len(payload) != size or zlib.crc32(payload) != crc:
+        raise ValueError(f"corrupt member at offset {offset} in {filename}")
+    return payload
+
+@data_io.cached_file(maxsize=2)
+def parse_index(filename):
+    # member name -> (bundle, entry); country bundles win over city bundles.
+    index = data_io.load_json(filename)
+    if index.get("version") != VERSION:
+        raise ValueError(f"{filename} is not a version {VERSION} bundle index")
+    members = {}
+    for name, bundle in sorted(index["bundles"].items(), key=lambda item: item[1]["region"] != "country"):
+        for member, entry in bundle["members"].items():
+            members.setdefault(member, (name, entry))
+    return members
+
+def read_district(district_id, source_dir=data_dir):
+    # The prayer times of one district, from whichever bundle holds them;
+    # None if no bundle does.
+    filename = os.path.join(source_dir, INDEX_FILENAME)
+    members = parse_index(filename)
+    found = members.get(f"prayer_times_{district_id}.json")
+    if found is None:
+        return None
+    name, entry = found
+    return data_io.loads(read_member(os.path.join(source_dir, name), entry))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bundle each region's data files into one indexed archive.")
+    parser.add_argument("--data-dir", default=data_dir)
+    commands = parser.add_subparsers(dest="command", required=True)
+    build_parser = commands.add_parser("build", help="write the bundles and bundle_index.json")
+    build_parser.add_argument("--per-city", action="store_true", help="also write one bundle per city")
+    read_parser = commands.add_parser("read", help="print one district's prayer times from its bundle")
+    read_parser.add_argument("district_id")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        build(args.data_dir, args.per_city)
+    else:
+        rows = read_district(args.district_id, args.data_dir)
+        if rows is None:
+            print(f"District {args.district_id} is not in any bundle")
+            sys.exit(1)
+        sys.stdout.write(data_io.dumps(rows).decode("utf-8") + "\n")
@@ -0,0 +1,214 @@
+import argparse
+import asyncio
+import email.utils
+import os
+import urllib.parse
+
+import precompress_data
+
+# Local stand-in for the CDN in front of data/. Serves the files listed in
+# precompress_data.SERVED_FILE with:
+#   - gzip/brotli variants built ahead of time by precompress_data.py
+#   - strong ETags from the content sha256 (one per encoding) and 304s
+#   - Cache-Control: immutable for a year when the URL carries ?v=<sha256
+#     prefix>, otherwise revalidate on every use
+#   - single byte ranges on the uncompressed file
+# Bodies are sent with loop.sendfile(), on an asyncio server with keep-alive.
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "public, max-age=0, must-revalidate"
+MIN_VERSION_LENGTH = 8
+MAX_HEADERS = 100
+
+class Catalog:
+    def __init__(self, source_dir, static_dir, precompress=True):
+        self.source_dir = source_dir
+        self.static_dir = static_dir
+        if precompress:
+            self.entries = precompress_data.main(source_dir, static_dir)
+        else:
+            self.entries = precompress_data.load_index(static_dir)
+
+    def lookup(self, name):
+        # Files refreshed while the server runs are re-indexed on first use.
+        filename = os.path.join(self.source_dir, name)
+        try:
+            st = os.stat(filename)
+        except FileNotFoundError:
+            return None
+        entry = self.entries.get(name)
+        if not entry or entry["mtime_ns"] != st.st_mtime_ns or entry["size"] != st.st_size:
+            entry = precompress_data.precompress_file(self.source_dir, self.static_dir, name)
+            self.entries[name] = entry
+        return entry
+
+    def path(self, name, encoding):
+        if encoding is None:
+            return os.path.join(self.source_dir, name)
+        return os.path.join(self.static_dir, self.entries[name]["variants"][encoding]["file"])
+
+def accepted_encodings(header):
+    # {"gzip": 1.0, "br": 0.5, ...} from an Accept-Encoding header.
+    accepted = {}
+    for part in (header or "").split(","):
+        token, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if token:
+            accepted[token.strip().lower()] = quality
+    return accepted
+
+def choose_encoding(entry, header):
+    accepted = accepted_encodings(header)
+    for encoding in ("br", "gzip"):
+        quality = accepted.get(encoding, accepted.get("*", 0.0))
+        if encoding in entry["variants"] and quality > 0:
+            return encoding
+    return None
+
+def parse_range(header, size):
+    # Returns (start, end) inclusive, None when there is no usable Range
+    # header, or False when the range can't be satisfied.
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    start, _, end = header[len("bytes="):].strip().partition("-")
+    try:
+        if start:
+            start = int(start)
+            end = min(int(end), size - 1) if end else size - 1
+        else:
+            length = int(end)
+            if length == 0:
+                return False
+            start, end = max(0, size - length), size - 1
+    except ValueError:
+        return None
+    if start > end or start >= size:
+        return False
+    return start, end
+
+def etag_matches(header, etag):
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
+
+async def send_response(writer, status, reason, headers, body=b""):
+    lines = [f"HTTP/1.1 {status} {reason}", f"Date: {email.utils.formatdate(usegmt=True)}"]
+    lines += [f"{key}: {value}" for key, value in headers.items()]
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+    await writer.drain()
+
+async def respond(catalog, writer, method, target, headers):
+    if method not in ("GET", "HEAD"):
+        await send_response(writer, 405, "Method Not Allowed", {"Allow": "GET, HEAD", "Content-Length": "0"})
+        return
+
+    url = urllib.parse.urlsplit(target)
+    name = urllib.parse.unquote(url.path).lstrip("/")
+    entry = catalog.lookup(name) if precompress_data.SERVED_FILE.match(name) else None
+    if entry is None:
+        await send_response(writer, 404, "Not Found", {"Content-Length": "0"})
+        return
+
+    sha256 = entry["sha256"]
+    version = urllib.parse.parse_qs(url.query).get("v", [""])[0]
+    versioned = len(version) >= MIN_VERSION_LENGTH and sha256.startswith(version)
+
+    byte_range = parse_range(headers.get("range"), entry["size"])
+    if byte_range is not None and headers.get("if-range") not in (None, f'"{sha256}"'):
+        byte_range = None
+    # Ranges are served from the uncompressed file only.
+    encoding = None if byte_range is not None else choose_encoding(entry, headers.get("accept-encoding"))
+    etag = f'"{sha256}"' if encoding is None else f'"{sha256}-{encoding}"'
+
+    response_headers = {
+        "ETag": etag,
+        "Cache-Control": IMMUTABLE if versioned else REVALIDATE,
+        "Vary": "Accept-Encoding",
+        "Accept-Ranges": "bytes",
+    }
+    if etag_matches(headers.get("if-none-match"), etag):
+        await send_response(writer, 304, "Not Modified", response_headers)
+        return
+
+    response_headers["Content-Type"] = "application/json; charset=utf-8" if name.endswith(".json") else "application/octet-stream"
+    if encoding is not None:
+        response_headers["Content-Encoding"] = encoding
+
+    size = entry["size"] if encoding is None else entry["variants"][encoding]["size"]
+    status, reason, offset, count = 200, "OK", 0, size
+    if byte_range is False:
+        response_headers["Content-Range"] = f"bytes */{entry['size']}"
+        response_headers["Content-Length"] = "0"
+        await send_response(writer, 416, "Range Not Satisfiable", response_headers)
+        return
+    if byte_range is not None:
+        start, end = byte_range
+        status, reason, offset, count = 206, "Partial Content", start, end - start + 1
+        response_headers["Content-Range"] = f"bytes {start}-{end}/{entry['size']}"
+    response_headers["Content-Length"] = str(count)
+
+    await send_response(writer, status, reason, response_headers)
+    if method == "HEAD":
+        return
+    with open(catalog.path(name, encoding), "rb") as f:
+        await asyncio.get_running_loop().sendfile(writer.transport, f, offset, count)
+
+async def handle_connection(catalog, reader, writer):
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            parts = request_line.decode("latin-1").split()
+            if len(parts) != 3:
+                await send_response(writer, 400, "Bad Request", {"Content-Length": "0", "Connection": "close"})
+                break
+            method, target, version = parts
+
+            headers = {}
+            for _ in range(MAX_HEADERS):
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                key, _, value = line.decode("latin-1").partition(":")
+                headers[key.strip().lower()] = value.strip()
+
+            connection = headers.get("connection", "").lower()
+            keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+            await respond(catalog, writer, method, target, headers)
+            if not keep_alive:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+async def serve(host, port, catalog):
+    server = await asyncio.start_server(lambda r, w: handle_connection(catalog, r, w), host, port)
+    print(f"Serving {catalog.source_dir} on http://{host}:{port}/")
+    async with server:
+        await server.serve_forever()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the generated data files like the CDN would.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--data-dir", default=precompress_data.data_dir)
+    parser.add_argument("--static-dir", default=precompress_data.DEFAULT_OUT_DIR,
+                        help="where precompress_data.py put the compressed variants")
+    parser.add_argument("--no-precompress", action="store_true",
+                        help="don't refresh the compressed variants at startup")
+    args = parser.parse_args()
+    catalog = Catalog(args.data_dir, args.static_dir, precompress=not args.no_precompress)
+    try:
+        asyncio.run(serve(args.host, args.port, catalog))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,177 @@
+import argparse
+import datetime
+import glob
+import os
+import re
+import sqlite3
+import sys
+
+import data_io
+import timetable
+
+# Keeps the whole data/ hierarchy in one SQLite database instead of thousands
+# of loose JSON files, and can write the JSON layout back out of it.
+#
+#   python scripts/sqlite_store.py build              data/*.json -> database
+#   python scripts/sqlite_store.py export OUT_DIR     database -> JSON files
+#   python scripts/sqlite_store.py times 9541 2025-11-23
+
+script_dir = os.path.dirname(os.path.realpath(__file__))
+repo_root = os.path.abspath(os.path.join(script_dir, ".."))
+data_dir = os.path.join(repo_root, "data")
+DEFAULT_DB = os.path.join(data_dir, "prayer_data.sqlite3")
+
+# "position" keeps the order of every list so the export matches the API.
+SCHEMA = f"""
+CREATE TABLE countries (
+    UlkeID TEXT PRIMARY KEY,
+    UlkeAdi TEXT,
+    UlkeAdiEn TEXT,
+    position INTEGER NOT NULL
+);
+CREATE TABLE cities (
+    SehirID TEXT PRIMARY KEY,
+    UlkeID TEXT NOT NULL REFERENCES countries (UlkeID),
+    SehirAdi TEXT,
+    SehirAdiEn TEXT,
+    position INTEGER NOT NULL
+);
+CREATE TABLE districts (
+    IlceID TEXT PRIMARY KEY,
+    SehirID TEXT NOT NULL REFERENCES cities (SehirID),
+    IlceAdi TEXT,
+    IlceAdiEn TEXT,
+    position INTEGER NOT NULL
+);
+CREATE TABLE prayer_times (
+    IlceID TEXT NOT NULL,
+    date TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    {", ".join(f"{field} {'REAL' if field == 'GreenwichOrtalamaZamani' else 'TEXT'}" for field in timetable.ROW_FIELDS)},
+    PRIMARY KEY (IlceID, date)
+) WITHOUT ROWID;
+CREATE INDEX cities_by_country ON cities (UlkeID, position);
+CREATE INDEX districts_by_city ON districts (SehirID, position);
+CREATE INDEX prayer_times_by_date ON prayer_times (date);
+"""
+
+LIST_FILE = re.compile(r"^(cities|districts|prayer_times)_(\d+)\.json$")
+
+def connect(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+def list_files(source_dir, kind):
+    # (parent ID, path) for every cities_/districts_/prayer_times_ file.
+    found = []
+    for filename in glob.glob(os.path.join(source_dir, f"{kind}_*.json")):
+        match = LIST_FILE.match(os.path.basename(filename))
+        if match and match.group(1) == kind:
+            found.append((match.group(2), filename))
+    return sorted(found, key=lambda item: int(item[0]))
+
+def build(db_path, source_dir=data_dir):
+    # Built into a temporary file and moved into place, so readers never see
+    # a half-written database.
+    tmp_path = db_path + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    conn = connect(tmp_path)
+    conn.executescript(SCHEMA)
+
+    with conn:
+        countries = data_io.Country.from_list(data_io.load_json(os.path.join(source_dir, "countries.json")))
+        conn.executemany(
+            "INSERT INTO countries VALUES (?, ?, ?, ?)",
+            [(c.UlkeID, c.UlkeAdi, c.UlkeAdiEn, i) for i, c in enumerate(countries)])
+
+        for ulke_id, filename in list_files(source_dir, "cities"):
+            conn.executemany(
+                "INSERT OR REPLACE INTO cities VALUES (?, ?, ?, ?, ?)",
+                [(c.SehirID, ulke_id, c.SehirAdi, c.SehirAdiEn, i)
+                 for i, c in enumerate(data_io.City.from_list(data_io.load_json(filename)))])
+
+        for sehir_id, filename in list_files(source_dir, "districts"):
+            conn.executemany(
+                "INSERT OR REPLACE INTO districts VALUES (?, ?, ?, ?, ?)",
+                [(d.IlceID, sehir_id, d.IlceAdi, d.IlceAdiEn, i)
+                 for i, d in enumerate(data_io.District.from_list(data_io.load_json(filename)))])
+
+        placeholders = ", ".join("?" * (len(timetable.ROW_FIELDS) + 3))
+        for ilce_id, filename in list_files(source_dir, "prayer_times"):
+            conn.executemany(
+                f"INSERT OR REPLACE INTO prayer_times VALUES ({placeholders})",
+                [(ilce_id, timetable.row_date(row).isoformat(), i, *(row.get(field) for field in timetable.ROW_FIELDS))
+                 for i, row in enumerate(data_io.load_json(filename))])
+    conn.execute("ANALYZE")
+    conn.close()
+    os.replace(tmp_path, db_path)
+    print(f"Built {db_path}")
+
+def export(db_path, out_dir):
+    # Writes countries.json, cities_*, districts_* and prayer_times_* back out
+    # in the same layout and formatting as the fetch scripts.
+    os.makedirs(out_dir, exist_ok=True)
+    conn = connect(db_path)
+    written = 0
+
+    countries = conn.execute("SELECT UlkeAdi, UlkeAdiEn, UlkeID FROM countries ORDER BY position").fetchall()
+    data_io.save_json(os.path.join(out_dir, "countries.json"), [dict(row) for row in countries])
+    written += 1
+
+    for (ulke_id,) in conn.execute("SELECT DISTINCT UlkeID FROM cities"):
+        rows = conn.execute("SELECT SehirAdi, SehirAdiEn, SehirID FROM cities WHERE UlkeID = ? ORDER BY position",
+                            (ulke_id,)).fetchall()
+        data_io.save_json(os.path.join(out_dir, f"cities_{ulke_id}.json"), [dict(row) for row in rows])
+        written += 1
+
+    for (sehir_id,) in conn.execute("SELECT DISTINCT SehirID FROM districts"):
+        rows = conn.execute("SELECT IlceAdi, IlceAdiEn, IlceID FROM districts WHERE SehirID = ? ORDER BY position",
+                            (sehir_id,)).fetchall()
+        data_io.save_json(os.path.join(out_dir, f"districts_{sehir_id}.json"), [dict(row) for row in rows])
+        written += 1
+
+    columns = ", ".join(timetable.ROW_FIELDS)
+    for (ilce_id,) in conn.execute("SELECT DISTINCT IlceID FROM prayer_times"):
+        rows = conn.execute(f"SELECT {columns} FROM prayer_times WHERE IlceID = ? ORDER BY position",
+                            (ilce_id,)).fetchall()
+        data_io.save_json(os.path.join(out_dir, f"prayer_times_{ilce_id}.json"), [dict(row) for row in rows])
+        written += 1
+
+    conn.close()
+    print(f"Exported {written} files to {out_dir}")
+
+def times_for(conn, district_id, date):
+    # One indexed lookup; returns the row as a dict in API field order, or None.
+    if isinstance(date, datetime.date):
+        date = date.isoformat()
+    columns = ", ".join(timetable.ROW_FIELDS)
+    row = conn.execute(f"SELECT {columns} FROM prayer_times WHERE IlceID = ? AND date = ?",
+                       (str(district_id), date)).fetchone()
+    return dict(row) if row else None
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SQLite backend for the prayer times data.")
+    parser.add_argument("--db", default=DEFAULT_DB, help="database file")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build_parser = commands.add_parser("build", help="load the JSON files into the database")
+    build_parser.add_argument("--data-dir", default=data_dir)
+    export_parser = commands.add_parser("export", help="write the JSON layout out of the database")
+    export_parser.add_argument("out_dir")
+    times_parser = commands.add_parser("times", help="print the times of a district on a date (YYYY-MM-DD)")
+    times_parser.add_argument("district_id")
+    times_parser.add_argument("date")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        build(args.db, args.data_dir)
+    elif args.command == "export":
+        export(args.db, args.out_dir)
+    else:
+        conn = connect(args.db)
+        row = times_for(conn, args.district_id, args.date)
+        if row is None:
+            print(f"No times for district {args.district_id} on {args.date}")
+            sys.exit(1)
+        print(data_io.dumps(row).decode("utf-8"))
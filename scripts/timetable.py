@@ -0,0 +1,83 @@
+import datetime
+
+# Helpers for reading the daily rows of a prayer_times_{IlceID}.json file.
+
+# The six daily prayers, in the order they occur during the day.
+PRAYER_KEYS = ["Imsak", "Gunes", "Ogle", "Ikindi", "Aksam", "Yatsi"]
+
+DATE_KEY = "MiladiTarihKisa"
+
+EPOCH = datetime.date(1970, 1, 1)
+
+# Every field of a daily row, in the order the API returns them.
+ROW_FIELDS = [
+    "HicriTarihKisa", "HicriTarihKisaIso8601", "HicriTarihUzun", "HicriTarihUzunIso8601",
+    "AyinSekliURL", "MiladiTarihKisa", "MiladiTarihKisaIso8601", "MiladiTarihUzun",
+    "MiladiTarihUzunIso8601", "GreenwichOrtalamaZamani", "Aksam", "Gunes", "GunesBatis",
+    "GunesDogus", "Ikindi", "Imsak", "KibleSaati", "Ogle", "Yatsi",
+]
+
+def parse_date(value):
+    # "23.11.2025" -> date(2025, 11, 23)
+    day, month, year = value.split(".")
+    return datetime.date(int(year), int(month), int(day))
+
+def parse_minutes(value):
+    # "06:24" -> 384 (minutes since local midnight)
+    hours, minutes = value.split(":")
+    return int(hours) * 60 + int(minutes)
+
+def parse_hijri(value):
+    # "3.6.1447" -> (1447, 6, 3)
+    day, month, year = value.split(".")
+    return int(year), int(month), int(day)
+
+def utc_offset_minutes(row):
+    # The offset in MiladiTarihUzunIso8601 ("...T00:00:00.0000000+03:00") is
+    # the district's own offset for that day, DST included.
+    # GreenwichOrtalamaZamani is only used when the ISO field is missing.
+    iso = row.get("MiladiTarihUzunIso8601")
+    if iso and len(iso) >= 6 and iso[-6] in "+-" and iso[-3] == ":":
+        sign = -1 if iso[-6] == "-" else 1
+        return sign * (int(iso[-5:-3]) * 60 + int(iso[-2:]))
+    return int(round(float(row["GreenwichOrtalamaZamani"]) * 60))
+
+def utc_instants(row):
+    # Epoch seconds (UTC) of each prayer in PRAYER_KEYS order. Offset policy:
+    #   - the day's offset comes from utc_offset_minutes(): the ISO suffix of
+    #     MiladiTarihUzunIso8601 wins over GreenwichOrtalamaZamani, which
+    #     upstream sends as 3.0 for every district, DST or not;
+    #   - a time is minutes after local midnight of the row's date, with that
+    #     one offset for the whole day (DST switches happen around 02:00-03:00,
+    #     before Imsak nearly everywhere);
+    #   - a Yatsi earlier than Ogle is after midnight and belongs to the next
+    #     day, as happens at high latitudes ("00:00").
+    midnight = (row_date(row) - EPOCH).days * 86400 - utc_offset_minutes(row) * 60
+    ogle = parse_minutes(row["Ogle"])
+    instants = []
+    for key in PRAYER_KEYS:
+        minutes = parse_minutes(row[key])
+        if key == "Yatsi" and minutes < ogle:
+            minutes += 24 * 60
+        instants.append(midnight + minutes * 60)
+    return instants
+
+def format_minutes(minutes):
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+def row_date(row):
+    return parse_date(row[DATE_KEY])
+
+def last_date(rows):
+    # Rows are in date order, but don't rely on it.
+    dates = [row_date(row) for row in rows if row.get(DATE_KEY)]
+    return max(dates) if dates else None
+
+def days_left(rows, today=None):
+    # Number of days after `today` that are still covered by `rows`;
+    # negative once the data has run out.
+    today = today or datetime.date.today()
+    end = last_date(rows)
+    if end is None:
+        return -1
+    return (end - today).days
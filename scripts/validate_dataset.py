@@ -0,0 +1,148 @@
+import argparse
+import datetime
+import os
+import sys
+import time
+
+import numpy as np
+
+import data_io
+import timetable
+
+# Checks every prayer_times file at once: all rows are loaded into
+# (district x day x prayer) arrays and each invariant is one vectorized pass.
+#
+# Errors fail the run:
+#   order        a prayer earlier than the one before it (Yatsi after midnight
+#                is allowed, as happens at high latitudes)
+#   jump         a prayer moving more than --max-jump minutes (in UTC, so DST
+#                changes don't count) from one day to the next
+#   missing      a gap in the dates
+#   duplicate    the same MiladiTarihKisa twice
+#   unsorted     dates going backwards
+#   unparseable  a file or row that can't be read at all
+# Warnings are reported but only fail with --strict:
+#   tie          two consecutive prayers at the same minute (upstream does this
+#                for Ogle/Ikindi in some polar districts)
+#   offset       GreenwichOrtalamaZamani disagreeing with the offset in
+#                MiladiTarihUzunIso8601 (upstream currently always sends 3.0)
+
+script_dir = os.path.dirname(os.path.realpath(__file__))
+repo_root = os.path.abspath(os.path.join(script_dir, ".."))
+data_dir = os.path.join(repo_root, "data")
+
+MAX_JUMP_MINUTES = 90
+EXAMPLES = 5
+ERRORS = ["unparseable", "order", "jump", "missing", "duplicate", "unsorted"]
+WARNINGS = ["tie", "offset"]
+
+def parse_rows(rows):
+    # (date ordinals, minutes per prayer, ISO offsets, GreenwichOrtalamaZamani offsets)
+    dates, minutes, offsets, greenwich = [], [], [], []
+    for row in rows:
+        dates.append(timetable.row_date(row).toordinal())
+        minutes.append([timetable.parse_minutes(row[key]) for key in timetable.PRAYER_KEYS])
+        offsets.append(timetable.utc_offset_minutes(row))
+        greenwich.append(int(round(float(row["GreenwichOrtalamaZamani"]) * 60)))
+    return dates, minutes, offsets, greenwich
+
+def load_dataset(source_dir):
+    # Returns the district IDs, the padded arrays and the unparseable files.
+    district_ids, parsed, unparseable = [], [], []
+    for district_id, filename in data_io.iter_prayer_files(source_dir):
+        try:
+            parsed.append(parse_rows(data_io.load_json(filename)))
+            district_ids.append(district_id)
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            unparseable.append((district_id, str(e)))
+
+    count = len(parsed)
+    days = max((len(dates) for dates, _, _, _ in parsed), default=0)
+    arrays = {
+        "valid": np.zeros((count, days), dtype=bool),
+        "dates": np.zeros((count, days), dtype=np.int32),
+        "minutes": np.zeros((count, days, len(timetable.PRAYER_KEYS)), dtype=np.int32),
+        "offsets": np.zeros((count, days), dtype=np.int32),
+        "greenwich": np.zeros((count, days), dtype=np.int32),
+    }
+    for index, (dates, minutes, offsets, greenwich) in enumerate(parsed):
+        length = len(dates)
+        if not length:
+            continue
+        arrays["valid"][index, :length] = True
+        arrays["dates"][index, :length] = dates
+        arrays["minutes"][index, :length] = minutes
+        arrays["offsets"][index, :length] = offsets
+        arrays["greenwich"][index, :length] = greenwich
+    return district_ids, arrays, unparseable
+
+def run_checks(arrays, max_jump=MAX_JUMP_MINUTES):
+    # Returns {check name: (district index, day index) array of hits}.
+    valid = arrays["valid"]
+    minutes = arrays["minutes"].copy()
+    yatsi, ogle = timetable.PRAYER_KEYS.index("Yatsi"), timetable.PRAYER_KEYS.index("Ogle")
+    minutes[..., yatsi] += np.where(minutes[..., yatsi] < minutes[..., ogle], 24 * 60, 0)
+
+    steps = np.diff(minutes, axis=2)
+    day_steps = np.diff(arrays["dates"], axis=1)
+    pairs = valid[:, 1:] & valid[:, :-1]
+    consecutive = pairs & (day_steps == 1)
+
+    utc = minutes - arrays["offsets"][..., None]
+    jumps = np.abs(np.diff(utc, axis=1)).max(axis=2)
+
+    return {
+        "order": np.argwhere(((steps < 0).any(axis=2)) & valid),
+        "tie": np.argwhere(((steps == 0).any(axis=2)) & valid),
+        # Day-pair checks point at the later day of the pair.
+        "jump": np.argwhere((jumps > max_jump) & consecutive) + [0, 1],
+        "missing": np.argwhere(pairs & (day_steps > 1)) + [0, 1],
+        "duplicate": np.argwhere(pairs & (day_steps == 0)) + [0, 1],
+        "unsorted": np.argwhere(pairs & (day_steps < 0)) + [0, 1],
+        "offset": np.argwhere((arrays["greenwich"] != arrays["offsets"]) & valid),
+    }
+
+def describe(district_ids, arrays, hit):
+    district, day = hit
+    date = datetime.date.fromordinal(int(arrays["dates"][district, day]))
+    return f"district {district_ids[district]} on {date.strftime('%d.%m.%Y')}"
+
+def main(source_dir=data_dir, max_jump=MAX_JUMP_MINUTES, strict=False):
+    started = time.perf_counter()
+    district_ids, arrays, unparseable = load_dataset(source_dir)
+    loaded = time.perf_counter()
+    hits = run_checks(arrays, max_jump)
+    checked = time.perf_counter()
+
+    print(f"Loaded {len(district_ids)} districts x {arrays['valid'].shape[1]} days in {loaded - started:.2f}s, "
+          f"checked in {(checked - loaded) * 1000:.0f}ms")
+
+    failing = ERRORS + (WARNINGS if strict else [])
+    failed = False
+    for name in ERRORS + WARNINGS:
+        level = "ERROR" if name in failing else "WARN"
+        if name == "unparseable":
+            count = len(unparseable)
+            examples = [f"district {district_id}: {error}" for district_id, error in unparseable[:EXAMPLES]]
+        else:
+            count = len(hits[name])
+            examples = [describe(district_ids, arrays, hit) for hit in hits[name][:EXAMPLES]]
+        if not count:
+            continue
+        failed = failed or name in failing
+        print(f"[{level}] {name}: {count} {'files' if name == 'unparseable' else 'days'}")
+        for example in examples:
+            print(f"    {example}")
+
+    print("Validation failed." if failed else "Validation passed.")
+    return not failed
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Validate all prayer_times files in a few vectorized passes.")
+    parser.add_argument("--data-dir", default=data_dir)
+    parser.add_argument("--max-jump", type=int, default=MAX_JUMP_MINUTES,
+                        help="largest allowed day-to-day change of a prayer time, in minutes")
+    parser.add_argument("--strict", action="store_true", help="fail on warnings too")
+    args = parser.parse_args()
+    if not main(args.data_dir, args.max_jump, args.strict):
+        sys.exit(1)
@@ -0,0 +1,65 @@
+import os
+import shutil
+import sys
+
+import pytest
+
+repo_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(repo_root, "scripts"))
+
+# A small source tree cut from data/: Nepal and Argentina, each with its one
+# city and two of its districts. It is checked in so the tests don't depend
+# on what the last crawl wrote.
+fixture_dir = os.path.join(os.path.dirname(__file__), "data")
+
+# Districts the round-trip tests must cover: a +05:45 offset (Bhaktapur,
+# Nepal) and a high-latitude district whose Yatsi falls after midnight
+# (Ushuaia).
+SAMPLE_DISTRICTS = {"15561", "11195"}
+
+def make_row(date, offset="+03:00", **times):
+    # A daily row in the API's layout; `date` is "DD.MM.YYYY".
+    day, month, year = date.split(".")
+    row = {
+        "HicriTarihKisa": "3.6.1447",
+        "HicriTarihKisaIso8601": None,
+        "HicriTarihUzun": "3 Cemaziyelahir 1447",
+        "HicriTarihUzunIso8601": None,
+        "AyinSekliURL": "https://namazvakti.diyanet.gov.tr/images/r3.gif",
+        "MiladiTarihKisa": date,
+        "MiladiTarihKisaIso8601": date,
+        "MiladiTarihUzun": f"{int(day)} Kasım {year}",
+        "MiladiTarihUzunIso8601": f"{year}-{month}-{day}T00:00:00.0000000{offset}" if offset else None,
+        "GreenwichOrtalamaZamani": 3.0,
+        "Aksam": "16:39",
+        "Gunes": "07:10",
+        "GunesBatis": "16:32",
+        "GunesDogus": "07:17",
+        "Ikindi": "14:19",
+        "Imsak": "05:41",
+        "KibleSaati": "09:54",
+        "Ogle": "12:00",
+        "Yatsi": "18:03",
+    }
+    row.update(times)
+    return row
+
+@pytest.fixture(scope="session")
+def dataset(tmp_path_factory):
+    # A copy of tests/data, so a test that writes next to its sources can't
+    # change what the others see.
+    out_dir = str(tmp_path_factory.mktemp("data") / "data")
+    shutil.copytree(fixture_dir, out_dir)
+    missing = SAMPLE_DISTRICTS - set(prayer_times_files(out_dir))
+    assert not missing, f"tests/data has no prayer_times file for {sorted(missing)}"
+    return out_dir
+
+def prayer_times_files(source_dir):
+    # IlceID -> path
+    return {name[len("prayer_times_"):-len(".json")]: os.path.join(source_dir, name)
+            for name in sorted(os.listdir(source_dir)) if name.startswith("prayer_times_")}
+
+def assert_same_files(source_dir, out_dir, names):
+    for name in names:
+        with open(os.path.join(source_dir, name), "rb") as f, open(os.path.join(out_dir, name), "rb") as g:
+            assert f.read() == g.read(), name
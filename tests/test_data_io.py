@@ -0,0 +1,75 @@
+import os
+import threading
+
+import data_io
+
+def test_atomic_write_replaces_without_leftovers(tmp_path):
+    filename = str(tmp_path / "file.json")
+    data_io.atomic_write(filename, b"old")
+    data_io.atomic_write(filename, b"new")
+    with open(filename, "rb") as f:
+        assert f.read() == b"new"
+    assert os.listdir(tmp_path) == ["file.json"]
+    assert os.stat(filename).st_mode & 0o777 == 0o666 & ~data_io.UMASK
+
+def test_concurrent_writers_of_one_file(tmp_path):
+    filename = str(tmp_path / "file.json")
+    payloads = [bytes([65 + i]) * 100000 for i in range(8)]
+    threads = [threading.Thread(target=data_io.atomic_write, args=(filename, payload)) for payload in payloads]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    with open(filename, "rb") as f:
+        assert f.read() in payloads
+    assert os.listdir(tmp_path) == ["file.json"]
+
+def test_write_if_changed(tmp_path):
+    filename = str(tmp_path / "file.json")
+    assert data_io.write_if_changed(filename, b"[]")
+    assert not data_io.write_if_changed(filename, b"[]")
+    assert data_io.write_if_changed(filename, b"[1]")
+
+def test_records_round_trip():
+    district = {"IlceAdi": "ŞİLE", "IlceAdiEn": "SILE", "IlceID": "9552"}
+    assert data_io.District.from_dict(district).to_dict() == district
+    # Unknown fields are kept, missing ones aren't invented.
+    odd = {"kod": "1", "IlceAdi": "X", "Extra": [1]}
+    record = data_io.District.from_dict(odd)
+    assert record.to_dict() == odd
+    assert record.IlceAdiEn is None
+    assert record.id == "1"
+    assert data_io.district_id(record) == data_io.district_id(odd) == "1"
+    assert data_io.City.from_list(None) == []
+
+def test_backends_agree_on_dataset_values():
+    data = [{"a": 'İstanbul "x" \\ /\t', "b": None, "c": 3.0, "d": 5.75, "e": [1, -2], "f": {}}]
+    previous = data_io.backend
+    try:
+        outputs = set()
+        for name in data_io.available_backends():
+            data_io.set_backend(name)
+            outputs.add((data_io.dumps(data), data_io.dumps(data, compact=True)))
+            assert data_io.loads(data_io.dumps(data)) == data
+    finally:
+        data_io.set_backend(previous)
+    assert len(outputs) == 1
+
+def test_cached_file_reparses_changed_files(tmp_path):
+    filename = str(tmp_path / "a.json")
+    calls = []
+
+    @data_io.cached_file(maxsize=2)
+    def parse(filename):
+        calls.append(filename)
+        return data_io.load_json(filename)
+
+    data_io.save_json(filename, [1])
+    assert parse(filename) == parse(filename) == [1]
+    assert len(calls) == 1
+    data_io.save_json(filename, [1, 2])
+    assert parse(filename) == [1, 2]
+    assert len(calls) == 2
+    parse.cache_clear()
+    parse(filename)
+    assert len(calls) == 3
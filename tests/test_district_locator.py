@@ -0,0 +1,38 @@
+import math
+import random
+
+import district_locator
+
+def great_circle_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    cosine = (math.sin(lat1) * math.sin(lat2) + math.cos(lat1) * math.cos(lat2) * math.cos(lon2 - lon1))
+    return math.acos(max(-1.0, min(1.0, cosine))) * district_locator.EARTH_RADIUS_KM
+
+def build_locator(tmp_path, coordinates):
+    gazetteer = tmp_path / "gazetteer.csv"
+    gazetteer.write_text("IlceID,lat,lon\n" + "".join(f"{district_id},{lat},{lon}\n"
+                                                     for district_id, (lat, lon) in coordinates.items()))
+    path = str(tmp_path / "district_locations.bin")
+    assert district_locator.build(path, str(tmp_path), str(gazetteer))
+    return district_locator.DistrictLocator(path)
+
+def test_nearest_matches_brute_force(tmp_path):
+    rng = random.Random(1)
+    coordinates = {i: (rng.uniform(-89, 89), rng.uniform(-180, 180)) for i in range(1, 501)}
+    locator = build_locator(tmp_path, coordinates)
+    for _ in range(50):
+        lat, lon = rng.uniform(-90, 90), rng.uniform(-180, 180)
+        found = locator.nearest(lat, lon, 3)
+        expected = sorted(coordinates, key=lambda i: great_circle_km(lat, lon, *coordinates[i]))[:3]
+        assert [int(district_id) for district_id, _ in found] == expected
+
+def test_nearest_across_the_antimeridian(tmp_path):
+    locator = build_locator(tmp_path, {1: (0.0, 179.9), 2: (0.0, 170.0)})
+    (district_id, distance), = locator.nearest(0.0, -179.9, 1)
+    assert district_id == "1"
+    assert distance < 25
+
+def test_nearest_with_no_count(tmp_path):
+    locator = build_locator(tmp_path, {1: (41.0, 29.0)})
+    assert locator.nearest(41.0, 29.0, 0) == []
+    assert locator.nearest(41.0, 29.0, -1) == []
@@ -0,0 +1,14 @@
+import http_client
+
+def test_master_data_failures():
+    client = http_client.RequestClient()
+    client.exhausted = [
+        "https://ezanvakti.emushaf.net/ulkeler",
+        "https://ezanvakti.emushaf.net/vakitler/9541",
+        "https://ezanvakti.emushaf.net/ilceler/539",
+        "https://ezanvakti.emushaf.net/ilce-detay/9541",
+    ]
+    assert client.master_data_failures() == [
+        "https://ezanvakti.emushaf.net/ulkeler",
+        "https://ezanvakti.emushaf.net/ilceler/539",
+    ]
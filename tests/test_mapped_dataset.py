@@ -0,0 +1,20 @@
+import datetime
+
+import data_io
+import mapped_dataset
+import timetable
+from conftest import prayer_times_files
+
+def test_matches_json(dataset, tmp_path):
+    path = str(tmp_path / "prayer_times.bin")
+    assert mapped_dataset.build(path, dataset)
+    mapped = mapped_dataset.MappedDataset(path)
+    files = prayer_times_files(dataset)
+    assert sorted(map(str, mapped.district_ids().tolist())) == sorted(files, key=int)
+    for district_id, filename in files.items():
+        for row in data_io.load_json(filename):
+            minutes, offset = mapped.day(district_id, timetable.row_date(row))
+            assert minutes == {key: timetable.parse_minutes(row[key]) for key in timetable.PRAYER_KEYS}
+            assert offset == timetable.utc_offset_minutes(row)
+    assert mapped.day(next(iter(files)), datetime.date(1999, 1, 1)) is None
+    mapped.close()
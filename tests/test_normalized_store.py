@@ -0,0 +1,13 @@
+import os
+
+import normalized_store
+from conftest import assert_same_files, prayer_times_files
+
+def test_export_is_byte_identical(dataset, tmp_path):
+    normalized_dir = str(tmp_path / "normalized")
+    normalized_store.build(dataset, normalized_dir)
+    out_dir = str(tmp_path / "export")
+    normalized_store.export(out_dir, normalized_dir)
+    names = [os.path.basename(filename) for filename in prayer_times_files(dataset).values()]
+    assert sorted(os.listdir(out_dir)) == sorted(names)
+    assert_same_files(dataset, out_dir, names)
@@ -0,0 +1,68 @@
+import datetime
+
+import pytest
+
+import data_io
+import prayer_query
+from conftest import make_row
+
+UTC = datetime.timezone.utc
+
+@pytest.fixture
+def source_dir(tmp_path):
+    # District 1 on +03:00, district 2 on +05:45; both pray Ogle at 12:00
+    # and Ikindi at 14:19 local time.
+    for district_id, offset in (("1", "+03:00"), ("2", "+05:45")):
+        rows = [make_row(date, offset) for date in ("22.11.2025", "23.11.2025", "24.11.2025")]
+        data_io.save_json(str(tmp_path / f"prayer_times_{district_id}.json"), rows)
+    prayer_query.clear_cache()
+    yield str(tmp_path)
+    prayer_query.clear_cache()
+
+@pytest.mark.parametrize("district_id, offset, ogle_utc", [
+    ("1", datetime.timedelta(hours=3), datetime.datetime(2025, 11, 23, 9, 0, tzinfo=UTC)),
+    ("2", datetime.timedelta(hours=5, minutes=45), datetime.datetime(2025, 11, 23, 6, 15, tzinfo=UTC)),
+])
+def test_next_prayer_from_utc(source_dir, district_id, offset, ogle_utc):
+    minute = datetime.timedelta(minutes=1)
+    prayer, when = prayer_query.next_prayer(district_id, ogle_utc - minute, source_dir)
+    assert prayer == "Ogle"
+    assert when == ogle_utc
+    assert when.utcoffset() == offset
+
+    prayer, when = prayer_query.next_prayer(district_id, ogle_utc + minute, source_dir)
+    assert prayer == "Ikindi"
+    assert when == ogle_utc + datetime.timedelta(hours=2, minutes=19)
+
+def test_next_prayer_naive_is_local(source_dir):
+    prayer, when = prayer_query.next_prayer("2", datetime.datetime(2025, 11, 23, 11, 59), source_dir)
+    assert (prayer, when) == ("Ogle", datetime.datetime(2025, 11, 23, 12, 0))
+
+def test_next_prayer_defaults_to_utc_now(tmp_path):
+    today = datetime.datetime.now(UTC).date()
+    rows = [make_row((today + datetime.timedelta(days=days)).strftime("%d.%m.%Y"), "+05:45")
+            for days in (-1, 0, 1)]
+    data_io.save_json(str(tmp_path / "prayer_times_3.json"), rows)
+    prayer_query.clear_cache()
+    prayer, when = prayer_query.next_prayer("3", source_dir=str(tmp_path))
+    assert when.utcoffset() == datetime.timedelta(hours=5, minutes=45)
+    assert datetime.datetime.now(UTC) < when <= datetime.datetime.now(UTC) + datetime.timedelta(days=1)
+
+def test_next_prayer_after_midnight_yatsi(tmp_path):
+    # At high latitudes Yatsi can be after midnight: the 22nd's "00:30" is
+    # on the 23rd, after the 23rd's Aksam and before its Imsak.
+    rows = [make_row(date, Imsak="02:10", Aksam="21:50", Yatsi="00:30")
+            for date in ("22.11.2025", "23.11.2025", "24.11.2025")]
+    data_io.save_json(str(tmp_path / "prayer_times_4.json"), rows)
+    prayer_query.clear_cache()
+    source_dir = str(tmp_path)
+
+    prayer, when = prayer_query.next_prayer("4", datetime.datetime(2025, 11, 22, 22, 0), source_dir)
+    assert (prayer, when) == ("Yatsi", datetime.datetime(2025, 11, 23, 0, 30))
+    prayer, when = prayer_query.next_prayer("4", datetime.datetime(2025, 11, 23, 0, 10), source_dir)
+    assert (prayer, when) == ("Yatsi", datetime.datetime(2025, 11, 23, 0, 30))
+    prayer, when = prayer_query.next_prayer("4", datetime.datetime(2025, 11, 23, 1, 0), source_dir)
+    assert (prayer, when) == ("Imsak", datetime.datetime(2025, 11, 23, 2, 10))
+    local = datetime.timezone(datetime.timedelta(hours=3))
+    prayer, when = prayer_query.next_prayer("4", datetime.datetime(2025, 11, 22, 21, 1, tzinfo=UTC), source_dir)
+    assert (prayer, when) == ("Yatsi", datetime.datetime(2025, 11, 23, 0, 30, tzinfo=local))
@@ -0,0 +1,17 @@
+import shutil
+
+import data_io
+import region_bundles
+from conftest import SAMPLE_DISTRICTS, prayer_times_files
+
+def test_read_district_matches_json(dataset, tmp_path):
+    # The bundles are written next to their sources; keep them out of the
+    # shared copy.
+    source_dir = str(tmp_path / "data")
+    shutil.copytree(dataset, source_dir)
+    region_bundles.build(source_dir, per_city=True)
+    files = prayer_times_files(source_dir)
+    assert SAMPLE_DISTRICTS <= set(files)
+    for district_id, filename in files.items():
+        assert region_bundles.read_district(district_id, source_dir) == data_io.load_json(filename)
+    assert region_bundles.read_district("0", source_dir) is None
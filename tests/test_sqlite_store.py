@@ -0,0 +1,23 @@
+import os
+
+import data_io
+import sqlite_store
+import timetable
+from conftest import assert_same_files, prayer_times_files
+
+def test_export_is_byte_identical(dataset, tmp_path):
+    db_path = str(tmp_path / "prayer_data.sqlite3")
+    sqlite_store.build(db_path, dataset)
+    out_dir = str(tmp_path / "export")
+    sqlite_store.export(db_path, out_dir)
+    assert sorted(os.listdir(out_dir)) == sorted(os.listdir(dataset))
+    assert_same_files(dataset, out_dir, os.listdir(dataset))
+
+def test_times_for(dataset, tmp_path):
+    db_path = str(tmp_path / "prayer_data.sqlite3")
+    sqlite_store.build(db_path, dataset)
+    conn = sqlite_store.connect(db_path)
+    for district_id, filename in prayer_times_files(dataset).items():
+        row = data_io.load_json(filename)[0]
+        assert sqlite_store.times_for(conn, district_id, timetable.row_date(row)) == row
+    conn.close()
@@ -0,0 +1,63 @@
+import datetime
+
+import pytest
+
+import timetable
+from conftest import make_row
+
+def instant(year, month, day, hour, minute, offset_minutes):
+    zone = datetime.timezone(datetime.timedelta(minutes=offset_minutes))
+    return int(datetime.datetime(year, month, day, hour, minute, tzinfo=zone).timestamp())
+
+def test_parse_date():
+    assert timetable.parse_date("23.11.2025") == datetime.date(2025, 11, 23)
+    assert timetable.parse_date("1.2.2026") == datetime.date(2026, 2, 1)
+
+def test_parse_minutes():
+    assert timetable.parse_minutes("06:24") == 384
+    assert timetable.parse_minutes("00:00") == 0
+    assert timetable.parse_minutes("23:59") == 1439
+
+@pytest.mark.parametrize("offset, minutes", [
+    ("+03:00", 180),
+    ("+05:45", 345),
+    ("-03:30", -210),
+    ("-11:00", -660),
+    ("+00:00", 0),
+])
+def test_utc_offset_from_iso(offset, minutes):
+    assert timetable.utc_offset_minutes(make_row("23.11.2025", offset)) == minutes
+
+def test_iso_offset_wins_over_greenwich_field():
+    # Upstream sends GreenwichOrtalamaZamani = 3.0 for every district.
+    row = make_row("23.11.2025", "+01:00")
+    assert row["GreenwichOrtalamaZamani"] == 3.0
+    assert timetable.utc_offset_minutes(row) == 60
+
+def test_greenwich_field_without_iso():
+    row = make_row("23.11.2025", offset=None, GreenwichOrtalamaZamani=5.75)
+    assert timetable.utc_offset_minutes(row) == 345
+
+@pytest.mark.parametrize("offset, offset_minutes", [("+03:00", 180), ("+05:45", 345), ("-05:00", -300)])
+def test_utc_instants(offset, offset_minutes):
+    row = make_row("23.11.2025", offset)
+    expected = [instant(2025, 11, 23, *divmod(timetable.parse_minutes(row[key]), 60), offset_minutes)
+                for key in timetable.PRAYER_KEYS]
+    assert timetable.utc_instants(row) == expected
+
+def test_late_yatsi_rolls_to_next_day():
+    # High latitudes: Yatsi after midnight is sent as "00:00" (or later).
+    row = make_row("21.06.2025", "+02:00", Aksam="22:50", Yatsi="00:00")
+    instants = timetable.utc_instants(row)
+    assert instants[timetable.PRAYER_KEYS.index("Yatsi")] == instant(2025, 6, 22, 0, 0, 120)
+    assert instants == sorted(instants)
+
+def test_evening_yatsi_stays_on_its_day():
+    row = make_row("23.11.2025", "+03:00", Yatsi="18:03")
+    assert timetable.utc_instants(row)[-1] == instant(2025, 11, 23, 18, 3, 180)
+
+def test_days_left():
+    rows = [make_row("23.11.2025"), make_row("24.11.2025")]
+    assert timetable.last_date(rows) == datetime.date(2025, 11, 24)
+    assert timetable.days_left(rows, datetime.date(2025, 11, 20)) == 4
+    assert timetable.days_left([], datetime.date(2025, 11, 20)) == -1